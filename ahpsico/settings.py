@@ -92,6 +92,23 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Use a shared backend (e.g. redis) in production, so every worker sees the
+# same invalidations. On the default local memory backend, the cached values
+# only last a minute (see api/caching.py). That includes the versions the ETags
+# of the lists come from, so the lists only answer 304 on a shared backend.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -140,10 +157,22 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "api.authentication.FirebaseAuthentication",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
 }
 
+FIREBASE_AUTHENTICATION = {
+    "VERIFIER": os.environ.get(
+        "AUTH_TOKEN_VERIFIER", "api.verifiers.FirebaseTokenVerifier"
+    ),
+    "TOKEN_CACHE": str(os.environ.get("FIREBASE_TOKEN_CACHE", "1")) == "1",
+    "ALLOW_SIGNED_TOKENS": str(os.environ.get("ALLOW_SIGNED_TOKENS")) == "1",
+}
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Ahpsico API",
     "DESCRIPTION": "Backend for the Ahpsico app",
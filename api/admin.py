@@ -4,8 +4,10 @@ from .models import *
 
 admin.site.register(Doctor)
 admin.site.register(Patient)
+admin.site.register(Registration)
 admin.site.register(Invite)
 admin.site.register(Advice)
 admin.site.register(Assignment)
 admin.site.register(Session)
 admin.site.register(SessionGroup)
+admin.site.register(Tombstone)
@@ -1,28 +1,141 @@
-import os
+import functools
+import hashlib
+import time
+from collections import OrderedDict
 
-import firebase_admin
-from firebase_admin import auth, credentials
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
 from rest_framework.authentication import BaseAuthentication
 
-from . import exceptions
-
-cred = credentials.Certificate(
-    {
-        "type": os.environ.get("FIREBASE_ACCOUNT_TYPE"),
-        "project_id": os.environ.get("FIREBASE_PROJECT_ID"),
-        "private_key_id": os.environ.get("FIREBASE_PRIVATE_KEY_ID"),
-        "private_key": os.environ.get("FIREBASE_PRIVATE_KEY").replace(r"\n", "\n"),
-        "client_email": os.environ.get("FIREBASE_CLIENT_EMAIL"),
-        "client_id": os.environ.get("FIREBASE_CLIENT_ID"),
-        "auth_uri": os.environ.get("FIREBASE_AUTH_URI"),
-        "token_uri": os.environ.get("FIREBASE_TOKEN_URI"),
-        "auth_provider_x509_cert_url": os.environ.get(
-            "FIREBASE_AUTH_PROVIDER_X509_CERT_URL"
-        ),
-        "client_x509_cert_url": os.environ.get("FIREBASE_CLIENT_X509_CERT_URL"),
-    }
-)
-default_app = firebase_admin.initialize_app(cred)
+from . import exceptions, roles
+from .utils import ForkSafeLock
+
+DEFAULTS = {
+    # dotted path of the api.verifiers.BaseTokenVerifier subclass used to
+    # verify the tokens
+    "VERIFIER": "api.verifiers.FirebaseTokenVerifier",
+    "PUBLIC_KEYS_URL": (
+        "https://www.googleapis.com/robot/v1/metadata/x509/"
+        "securetoken@system.gserviceaccount.com"
+    ),
+    "PUBLIC_KEYS_TIMEOUT": 5,
+    "CLOCK_SKEW_SECONDS": 5,
+    # verified tokens are remembered until they expire, so repeated requests
+    # with the same token skip the verification
+    "TOKEN_CACHE": True,
+    "TOKEN_CACHE_SIZE": 4096,
+    # alias of a Django cache to share verified tokens between processes
+    "TOKEN_CACHE_ALIAS": None,
+    # how long the tokens created by api.verifiers.SignedTokenVerifier live
+    "SIGNED_TOKEN_LIFETIME": 3600,
+    # api.verifiers.SignedTokenVerifier refuses to load when DEBUG is off,
+    # unless it is explicitly allowed, like on an isolated load test machine
+    "ALLOW_SIGNED_TOKENS": False,
+}
+
+
+def auth_setting(name):
+    """Returns the FIREBASE_AUTHENTICATION setting with the given name"""
+    user_settings = getattr(settings, "FIREBASE_AUTHENTICATION", {})
+    return user_settings.get(name, DEFAULTS[name])
+
+
+@functools.lru_cache
+def _load_verifier(path):
+    return import_string(path)()
+
+
+def get_verifier():
+    """Returns the token verifier configured in the FIREBASE_AUTHENTICATION setting"""
+    return _load_verifier(auth_setting("VERIFIER"))
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of verified ID tokens to the identity of their users,
+    keyed by the SHA-256 digest of the token. Entries never outlive the
+    expiration of their token.
+    """
+
+    key_prefix = "firebase-token:"
+
+    def __init__(self):
+        self._lock = ForkSafeLock()
+        self._entries = OrderedDict()
+
+    def get(self, id_token):
+        """Returns the (uid, phone_number) of a token verified before, or None"""
+        digest = self._digest(id_token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                if entry[2] > time.time():
+                    self._entries.move_to_end(digest)
+                    return entry[:2]
+                del self._entries[digest]
+
+        shared_cache = self._shared_cache()
+        if shared_cache is None:
+            return None
+        entry = shared_cache.get(self.key_prefix + digest)
+        if entry is None or entry[2] <= time.time():
+            return None
+        self._store(digest, entry)
+        return entry[:2]
+
+    def set(self, id_token, uid, phone_number, expires_at):
+        timeout = expires_at - time.time()
+        if timeout <= 0:
+            return
+        digest = self._digest(id_token)
+        entry = (uid, phone_number, expires_at)
+        self._store(digest, entry)
+        shared_cache = self._shared_cache()
+        if shared_cache is not None:
+            shared_cache.set(self.key_prefix + digest, entry, timeout=int(timeout))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, digest, entry):
+        max_size = auth_setting("TOKEN_CACHE_SIZE")
+        with self._lock:
+            self._entries[digest] = entry
+            self._entries.move_to_end(digest)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def _shared_cache(self):
+        alias = auth_setting("TOKEN_CACHE_ALIAS")
+        return caches[alias] if alias else None
+
+    @staticmethod
+    def _digest(id_token):
+        return hashlib.sha256(id_token.encode()).hexdigest()
+
+
+token_cache = TokenCache()
+
+
+class FirebaseUser:
+    """The user identified by the claims of a verified Firebase ID token"""
+
+    is_authenticated = True
+
+    def __init__(self, uid, phone_number=None):
+        self.uid = uid
+        self.phone_number = phone_number
+
+    @functools.cached_property
+    def role(self):
+        """The roles.Role of the user, resolved on first access"""
+        return roles.resolve_role(self.uid)
+
+    def __repr__(self):
+        return f"FirebaseUser(uid={self.uid!r})"
 
 
 class FirebaseAuthentication(BaseAuthentication):
@@ -33,15 +146,28 @@ class FirebaseAuthentication(BaseAuthentication):
             raise exceptions.NoAuthToken()
         """Removes the 'Bearer' prefix of the token"""
         id_token = auth_header.split(" ").pop()
+        """Reuses the identity of tokens that were already verified"""
+        use_token_cache = auth_setting("TOKEN_CACHE")
+        if use_token_cache:
+            identity = token_cache.get(id_token)
+            if identity is not None:
+                return (FirebaseUser(*identity), None)
         """Decodes the token. It raises an exception when it fails."""
+        verifier = get_verifier()
         try:
-            decoded_token = auth.verify_id_token(id_token)
+            decoded_token = verifier.verify(id_token)
+        except (ImproperlyConfigured, exceptions.PublicKeysUnavailable):
+            raise
         except Exception:
             raise exceptions.InvalidAuthToken()
-        """Get the uid from the decoded token, then use it to find and return the user object"""
+        """Get the user identified by the decoded token"""
         try:
-            uid = decoded_token.get("uid")
-            user = auth.get_user(uid)
+            user = verifier.get_user(decoded_token)
+        except ImproperlyConfigured:
+            raise
         except Exception:
             raise exceptions.FirebaseError()
+        expires_at = decoded_token.get("exp")
+        if use_token_cache and expires_at:
+            token_cache.set(id_token, user.uid, user.phone_number, expires_at)
         return (user, None)
@@ -0,0 +1,51 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# the backends whose values are only seen by the process that cached them
+LOCAL_BACKENDS = ["django.core.cache.backends.locmem.LocMemCache"]
+# a worker doesn't see the invalidations made by the other workers on a local
+# backend, so its values only last long enough to spare the repeated queries
+# of a burst of requests
+LOCAL_CACHE_TIMEOUT = 60
+
+
+def normalize_pk(pk):
+    """Returns the hex of the UUID primary key, or None if it isn't a valid UUID"""
+    try:
+        return uuid.UUID(str(pk)).hex
+    except ValueError:
+        return None
+
+
+def is_shared():
+    """Returns whether the cached values are seen by every worker"""
+    return settings.CACHES["default"]["BACKEND"] not in LOCAL_BACKENDS
+
+
+def timeout(seconds):
+    """
+    Returns the timeout of a cached value, which is at most LOCAL_CACHE_TIMEOUT
+    on a local backend. A None timeout never expires.
+    """
+    if is_shared():
+        return seconds
+    if seconds is None:
+        return LOCAL_CACHE_TIMEOUT
+    return min(seconds, LOCAL_CACHE_TIMEOUT)
+
+
+def forget(keys):
+    """
+    Deletes the cached values of the keys, now and again when the current
+    transaction is committed
+    """
+    keys = list(keys)
+    if not keys:
+        return
+    cache.delete_many(keys)
+    # a request that read the database before the transaction was committed
+    # could have cached the old values in the meantime
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,71 @@
+import hashlib
+from collections import namedtuple
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+Version = namedtuple("Version", ["etag", "last_modified"])
+
+
+def make_etag(request, *parts):
+    """
+    Returns a weak ETag of the parts. The accepted media type is part of it, as
+    the same version of a resource has different representations.
+    """
+    media_type = getattr(request, "accepted_media_type", "")
+    digest = hashlib.sha1(repr((media_type, *parts)).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def instance_version(request, instance, related=()):
+    """
+    Returns the Version of the instance, and of the related instances nested
+    in its representation, from their updated_at. The related instances should
+    be loaded with the instance, so that this doesn't run any query.
+    """
+    instances = [instance] + [getattr(instance, name) for name in related]
+    parts = [(obj.pk, obj.updated_at) for obj in instances]
+    last_modified = max(obj.updated_at for obj in instances)
+    etag = make_etag(request, request.get_full_path(), *parts)
+    return Version(etag, last_modified.timestamp())
+
+
+def not_modified(request, version):
+    """
+    Returns the 304 response for the conditional GET of a resource that didn't
+    change since the Version the client has, or None.
+    """
+    last_modified = version.last_modified
+    return get_conditional_response(
+        request,
+        etag=version.etag,
+        last_modified=int(last_modified) if last_modified is not None else None,
+    )
+
+
+def set_version(response, version):
+    """Adds the ETag and Last-Modified headers of the Version to the response"""
+    response["ETag"] = version.etag
+    if version.last_modified is not None:
+        response["Last-Modified"] = http_date(version.last_modified)
+    return response
+
+
+class ConditionalRetrieveMixin:
+    """
+    Answers conditional retrieve requests with 304 before serializing the
+    instance, when its Version didn't change. The version_related attribute
+    lists the related instances nested in the representation of the instance.
+    """
+
+    version_related = ()
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        version = instance_version(request, instance, self.version_related)
+        response = not_modified(request, version)
+        if response is not None:
+            return response
+        serializer = self.get_serializer(instance)
+        return set_version(Response(serializer.data), version)
@@ -29,3 +29,24 @@ class AssignmentStatus(StrEnum):
     @classmethod
     def choices(cls):
         return [(key.value, key.name) for key in cls]
+
+
+class UserRole(StrEnum):
+    DOCTOR = "DOCTOR"
+    PATIENT = "PATIENT"
+    UNREGISTERED = "UNREGISTERED"
+
+    @classmethod
+    def choices(cls):
+        return [(key.value, key.name) for key in cls]
+
+
+class SyncedModel(StrEnum):
+    SESSION = "SESSION"
+    ASSIGNMENT = "ASSIGNMENT"
+    ADVICE = "ADVICE"
+    INVITE = "INVITE"
+
+    @classmethod
+    def choices(cls):
+        return [(key.value, key.name) for key in cls]
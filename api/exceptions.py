@@ -22,6 +22,12 @@ class FirebaseError(APIException):
     default_code = "no_firebase_uid"
 
 
+class PublicKeysUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "The auth token can't be verified right now, try again later"
+    default_code = "public_keys_unavailable"
+
+
 class SignUpRequired(APIException):
     status_code = status.HTTP_406_NOT_ACCEPTABLE
     default_detail = "The user is not yet registered in the app"
@@ -44,3 +50,9 @@ class PatientAlreadyWithDoctor(APIException):
     status_code = status.HTTP_404_NOT_FOUND
     default_detail = "You can't send the invite, the patient is already with the doctor"
     default_code = "patient_already_with_doctor"
+
+
+class InviteAlreadySent(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "You already sent an invite to this patient"
+    default_code = "invite_already_sent"
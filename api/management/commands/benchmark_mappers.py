@@ -0,0 +1,106 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from ... import mappers, models
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares how long the serializers and the mappers.Mapper of the "
+        "read-only lists take to represent the same rows. The rows are created "
+        "in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Times each path runs, the fastest one is reported",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            querysets = self.create_rows(options["rows"])
+            for serializer_class, queryset in querysets:
+                self.compare(serializer_class, queryset, options["repeat"])
+            transaction.set_rollback(True)
+
+    def create_rows(self, count):
+        doctor = models.Doctor.objects.create(
+            uuid=uuid.uuid4(), name="Benchmark", phone_number=uuid.uuid4().hex
+        )
+        patients = models.Patient.objects.bulk_create(
+            models.Patient(
+                uuid=uuid.uuid4(), name=f"Patient {i}", phone_number=uuid.uuid4().hex
+            )
+            for i in range(10)
+        )
+        doctor.patient_set.add(*patients)
+        now = timezone.now()
+        sessions = models.Session.objects.bulk_create(
+            models.Session(
+                doctor=doctor,
+                patient=patients[i % len(patients)],
+                date=now + timezone.timedelta(hours=i),
+            )
+            for i in range(count)
+        )
+        models.Assignment.objects.bulk_create(
+            models.Assignment(
+                title=f"Assignment {i}",
+                description="",
+                doctor=doctor,
+                patient=session.patient,
+                delivery_session=session,
+            )
+            for i, session in enumerate(sessions)
+        )
+        advices = models.Advice.objects.bulk_create(
+            models.Advice(message=f"Advice {i}", doctor=doctor) for i in range(count)
+        )
+        models.Advice.patients.through.objects.bulk_create(
+            models.Advice.patients.through(advice=advice, patient=patient)
+            for advice in advices
+            for patient in patients[:3]
+        )
+        return [
+            (
+                serializer_class,
+                serializer_class.Meta.model.objects.filter(doctor=doctor),
+            )
+            for serializer_class in mappers.MAPPED_SERIALIZERS
+        ]
+
+    def compare(self, serializer_class, queryset, repeat):
+        mapper = mappers.get_mapper(serializer_class)
+
+        def serialize():
+            rows = serializer_class.setup_eager_loading(queryset.order_by("pk"))
+            return serializer_class(rows, many=True).data
+
+        def map_rows():
+            return mapper.to_representation(mapper.values(queryset.order_by("pk")))
+
+        serializer_time = self.best_time(serialize, repeat)
+        mapper_time = self.best_time(map_rows, repeat)
+        self.stdout.write(
+            f"{serializer_class.__name__}: {queryset.count()} rows, "
+            f"serializer {serializer_time * 1000:.1f}ms, "
+            f"mapper {mapper_time * 1000:.1f}ms, "
+            f"{serializer_time / mapper_time:.1f}x faster"
+        )
+
+    @staticmethod
+    def best_time(func, repeat):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        return min(times)
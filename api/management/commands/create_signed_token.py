@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from ...verifiers import SignedTokenVerifier
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates a token accepted by api.verifiers.SignedTokenVerifier, "
+        "to authenticate requests of load tests without Firebase"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("uid")
+        parser.add_argument("phone_number")
+        parser.add_argument(
+            "--lifetime",
+            type=int,
+            default=None,
+            help="Seconds until the token expires",
+        )
+
+    def handle(self, *args, **options):
+        token = SignedTokenVerifier.create_token(
+            options["uid"], options["phone_number"], lifetime=options["lifetime"]
+        )
+        self.stdout.write(token)
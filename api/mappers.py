@@ -0,0 +1,167 @@
+import functools
+from collections import namedtuple
+from operator import itemgetter
+
+from rest_framework import ISO_8601
+from rest_framework import serializers as rest_serializers
+
+from . import serializers
+
+# the serializers of the read-only lists that are built with a Mapper
+MAPPED_SERIALIZERS = [
+    serializers.SessionSerializer,
+    serializers.AssignmentSerializer,
+    serializers.AdviceSerializer,
+]
+
+ManyRelation = namedtuple(
+    "ManyRelation", ["path", "owner_path", "through", "owner", "related", "convert"]
+)
+
+
+class Mapper:
+    """
+    Builds the same representations as a ModelSerializer straight from the rows
+    of QuerySet.values(), without instantiating the models or running the
+    serializer fields for every row. The fields are compiled to a getter each,
+    once per serializer. Many-to-many fields are loaded in one query each.
+    """
+
+    def __init__(self, serializer_class):
+        self.paths = []
+        self.many_relations = []
+        self._build = self._compile(serializer_class(), "")
+
+    def values(self, queryset):
+        """Returns the rows of the queryset the representations are built from"""
+        return queryset.values(*self.paths)
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        relations = self._load_many_relations(rows)
+        build = self._build
+        return [build(row, relations) for row in rows]
+
+    def _load_many_relations(self, rows):
+        relations = {}
+        for relation in self.many_relations:
+            owner_pks = {row[relation.owner_path] for row in rows}
+            owner_pks.discard(None)
+            related = {}
+            if owner_pks:
+                links = relation.through.objects.filter(
+                    **{f"{relation.owner}__in": owner_pks}
+                )
+                links = links.order_by(relation.related).values_list(
+                    relation.owner, relation.related
+                )
+                for owner_pk, related_pk in links:
+                    related.setdefault(owner_pk, []).append(
+                        relation.convert(related_pk)
+                    )
+            relations[relation.path] = related
+        return relations
+
+    def _add_path(self, path):
+        if path not in self.paths:
+            self.paths.append(path)
+
+    def _compile(self, serializer, prefix):
+        opts = serializer.Meta.model._meta
+        pk_path = prefix + opts.pk.attname
+        self._add_path(pk_path)
+        getters = []
+        for name, field in serializer.fields.items():
+            path = prefix + field.source
+            if isinstance(field, rest_serializers.ManyRelatedField):
+                getters.append((name, self._compile_many(field, path, pk_path)))
+            elif isinstance(field, rest_serializers.BaseSerializer):
+                getters.append((name, self._compile_nested(field, path)))
+            else:
+                self._add_path(path)
+                getters.append((name, self._compile_field(field, path)))
+
+        def build(row, relations):
+            return {name: getter(row, relations) for name, getter in getters}
+
+        return build
+
+    def _compile_nested(self, serializer, path):
+        prefix = path + "__"
+        pk_path = prefix + serializer.Meta.model._meta.pk.attname
+        build = self._compile(serializer, prefix)
+
+        def getter(row, relations):
+            if row[pk_path] is None:
+                return None
+            return build(row, relations)
+
+        return getter
+
+    def _compile_many(self, field, path, owner_path):
+        model_field = field.parent.Meta.model._meta.get_field(field.source)
+        through = model_field.remote_field.through
+        owner = through._meta.get_field(model_field.m2m_field_name())
+        related = through._meta.get_field(model_field.m2m_reverse_field_name())
+        self.many_relations.append(
+            ManyRelation(
+                path=path,
+                owner_path=owner_path,
+                through=through,
+                owner=owner.attname,
+                related=related.attname,
+                convert=self._converter(field.child_relation) or (lambda value: value),
+            )
+        )
+
+        def getter(row, relations):
+            return relations[path].get(row[owner_path], [])
+
+        return getter
+
+    def _compile_field(self, field, path):
+        convert = self._converter(field)
+        if convert is None:
+            get = itemgetter(path)
+            return lambda row, relations: get(row)
+
+        def getter(row, relations):
+            value = row[path]
+            return None if value is None else convert(value)
+
+        return getter
+
+    def _converter(self, field):
+        """
+        Returns the function converting the values of the field, or None when
+        they are represented as they come from the database
+        """
+        if isinstance(field, rest_serializers.PrimaryKeyRelatedField):
+            return field.pk_field.to_representation if field.pk_field else None
+        output_format = getattr(field, "format", None)
+        if (
+            isinstance(field, rest_serializers.DateTimeField)
+            and isinstance(output_format, str)
+            and output_format.lower() != ISO_8601
+        ):
+
+            def convert(value):
+                return field.enforce_timezone(value).strftime(output_format)
+
+            return convert
+        if isinstance(field, rest_serializers.ChoiceField):
+            choices = field.choice_strings_to_values
+            return lambda value: choices.get(str(value), value)
+        if isinstance(
+            field, (rest_serializers.CharField, rest_serializers.IntegerField)
+        ):
+            return None
+        return field.to_representation
+
+
+@functools.lru_cache
+def get_mapper(serializer_class):
+    """Returns the compiled Mapper of the serializer, or None if it has none"""
+    if serializer_class not in MAPPED_SERIALIZERS:
+        return None
+    return Mapper(serializer_class)
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(
+                fields=["doctor", "date"], name="session_doctor_date_idx"
+            ),
+        ),
+    ]
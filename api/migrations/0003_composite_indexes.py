@@ -0,0 +1,37 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0002_session_doctor_date_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="assignment",
+            index=models.Index(
+                fields=["patient", "status"], name="assignment_patient_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="assignment",
+            index=models.Index(
+                fields=["patient", "doctor", "status"],
+                name="assignment_pat_doc_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(
+                fields=["patient", "date"], name="session_patient_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(
+                fields=["patient", "doctor", "date"], name="session_pat_doc_date_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 4.2.2 on 2026-10-17 02:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0004_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "model",
+                    models.CharField(
+                        choices=[
+                            ("SESSION", "SESSION"),
+                            ("ASSIGNMENT", "ASSIGNMENT"),
+                            ("ADVICE", "ADVICE"),
+                            ("INVITE", "INVITE"),
+                        ],
+                        max_length=200,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                ("doctor_uuid", models.UUIDField(null=True)),
+                ("patient_uuid", models.UUIDField(null=True)),
+                ("deleted_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="invite",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="advice",
+            index=models.Index(
+                fields=["doctor", "updated_at"], name="advice_doctor_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="assignment",
+            index=models.Index(
+                fields=["doctor", "updated_at"], name="assignment_doc_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="assignment",
+            index=models.Index(
+                fields=["patient", "updated_at"], name="assignment_pat_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="invite",
+            index=models.Index(
+                fields=["doctor", "updated_at"], name="invite_doctor_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="invite",
+            index=models.Index(
+                fields=["patient", "updated_at"], name="invite_patient_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(
+                fields=["doctor", "updated_at"], name="session_doctor_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(
+                fields=["patient", "updated_at"], name="session_patient_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(
+                fields=["doctor_uuid", "deleted_at"],
+                name="tombstone_doctor_deleted_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(
+                fields=["patient_uuid", "deleted_at"],
+                name="tombstone_patient_deleted_idx",
+            ),
+        ),
+    ]
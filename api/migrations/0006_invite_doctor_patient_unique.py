@@ -0,0 +1,45 @@
+# Generated by Django 4.2.2 on 2026-10-17 02:40
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def delete_duplicate_invites(apps, schema_editor):
+    """
+    Keeps only the first invite from each doctor to each patient, recording
+    the tombstones of the deleted ones for the clients that synced them
+    """
+    Invite = apps.get_model("api", "Invite")
+    Tombstone = apps.get_model("api", "Tombstone")
+    first_ids = (
+        Invite.objects.values("doctor_id", "patient_id")
+        .annotate(first_id=Min("id"))
+        .values_list("first_id", flat=True)
+    )
+    duplicates = Invite.objects.exclude(id__in=list(first_ids))
+    Tombstone.objects.bulk_create(
+        Tombstone(
+            model="INVITE",
+            object_id=invite.id,
+            doctor_uuid=invite.doctor_id,
+            patient_uuid=invite.patient_id,
+        )
+        for invite in duplicates.only("id", "doctor_id", "patient_id")
+    )
+    duplicates.delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0005_sync"),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_invites, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="invite",
+            constraint=models.UniqueConstraint(
+                fields=("doctor", "patient"), name="invite_doctor_patient_unique"
+            ),
+        ),
+    ]
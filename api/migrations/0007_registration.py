@@ -0,0 +1,47 @@
+# Generated by Django 4.2.2 on 2026-10-17 03:05
+
+from django.db import migrations, models
+
+
+def register_users(apps, schema_editor):
+    """
+    Registers the existing doctors and patients. A uid registered as both is
+    registered as a doctor, like roles.resolve_role has always treated it.
+    """
+    Registration = apps.get_model("api", "Registration")
+    for model_name, role in [("Doctor", "DOCTOR"), ("Patient", "PATIENT")]:
+        model = apps.get_model("api", model_name)
+        Registration.objects.bulk_create(
+            (
+                Registration(uuid=uuid, role=role)
+                for uuid in model.objects.values_list("uuid", flat=True)
+            ),
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0006_invite_doctor_patient_unique"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Registration",
+            fields=[
+                ("uuid", models.UUIDField(primary_key=True, serialize=False)),
+                (
+                    "role",
+                    models.CharField(
+                        choices=[
+                            ("DOCTOR", "DOCTOR"),
+                            ("PATIENT", "PATIENT"),
+                            ("UNREGISTERED", "UNREGISTERED"),
+                        ],
+                        max_length=200,
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(register_users, migrations.RunPython.noop),
+    ]
@@ -3,7 +3,54 @@ from django.db import models
 from . import enums
 
 
-class Doctor(models.Model):
+class LoadedValuesMixin:
+    """
+    Remembers the values of the tracked fields that the instance was loaded
+    with, to tell which of them a save changed
+    """
+
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_loaded_values()
+        return instance
+
+    def _tracked_values(self):
+        deferred = self.get_deferred_fields()
+        return {
+            name: getattr(self, name)
+            for name in self.tracked_fields
+            if name not in deferred
+        }
+
+    def remember_loaded_values(self):
+        self._loaded_values = self._tracked_values()
+
+    def has_changed(self, *names):
+        """
+        Returns whether one of the fields changed since the instance was loaded.
+        Instances that weren't loaded from the database always changed.
+        """
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None:
+            return True
+        current = self._tracked_values()
+        return any(
+            name in current and (name not in loaded or current[name] != loaded[name])
+            for name in names
+        )
+
+    def previous_value(self, name):
+        """Returns the value the field was loaded with if it changed, or None"""
+        loaded = getattr(self, "_loaded_values", None) or {}
+        if name in loaded and self.has_changed(name):
+            return loaded[name]
+        return None
+
+
+class Doctor(LoadedValuesMixin, models.Model):
     uuid = models.UUIDField(primary_key=True)
     name = models.CharField(max_length=200)
     phone_number = models.CharField(max_length=200, unique=True)
@@ -11,25 +58,64 @@ class Doctor(models.Model):
     crp = models.CharField(max_length=200, blank=True, default="")
     pix_key = models.CharField(max_length=200, blank=True, default="")
     payment_details = models.CharField(max_length=200, blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # the fields nested in the representations of other rows
+    tracked_fields = ("name",)
 
     def __str__(self):
         return f"{self.name} (CRP {self.crp})"
 
 
-class Patient(models.Model):
+class Patient(LoadedValuesMixin, models.Model):
     uuid = models.UUIDField(primary_key=True)
     name = models.CharField(max_length=200)
     phone_number = models.CharField(max_length=200, unique=True)
     doctors = models.ManyToManyField(Doctor)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # the fields nested in the representations of other rows; the doctors are
+    # nested too, but the rows are touched when they change
+    tracked_fields = ("name", "phone_number")
 
     def __str__(self):
         return f"{self.name} ({self.phone_number})"
 
 
+class Registration(models.Model):
+    """
+    The role each uid is registered with, created along with its Doctor or
+    Patient in signals.py. Its primary key keeps a uid from being registered
+    as both a doctor and a patient, so they should be created in a transaction.
+    """
+
+    uuid = models.UUIDField(primary_key=True)
+    role = models.CharField(max_length=200, choices=enums.UserRole.choices())
+
+    def __str__(self):
+        return f"{self.uuid} ({self.role})"
+
+
 class Invite(models.Model):
     phone_number = models.CharField(max_length=200)
     doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE)
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["doctor", "patient"], name="invite_doctor_patient_unique"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["doctor", "updated_at"], name="invite_doctor_updated_idx"
+            ),
+            models.Index(
+                fields=["patient", "updated_at"], name="invite_patient_updated_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"to {self.patient} - from {self.doctor})"
@@ -39,6 +125,14 @@ class Advice(models.Model):
     message = models.CharField(max_length=200)
     doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE)
     patients = models.ManyToManyField(Patient)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["doctor", "updated_at"], name="advice_doctor_updated_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.message} - from {self.doctor})"
@@ -52,7 +146,7 @@ class SessionGroup(models.Model):
         return f"Doctor: {self.doctor} - Patient: ${self.patient}"
 
 
-class Session(models.Model):
+class Session(LoadedValuesMixin, models.Model):
     doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE)
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE)
     group_id = models.ForeignKey(SessionGroup, on_delete=models.CASCADE, null=True)
@@ -68,14 +162,34 @@ class Session(models.Model):
         default=enums.SessionType.INDIVIDUAL,
     )
     date = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     DATE_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
 
+    # the owners, whose lists and syncs lose the session when it moves
+    tracked_fields = ("doctor_id", "patient_id")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["doctor", "date"], name="session_doctor_date_idx"),
+            models.Index(fields=["patient", "date"], name="session_patient_date_idx"),
+            models.Index(
+                fields=["patient", "doctor", "date"],
+                name="session_pat_doc_date_idx",
+            ),
+            models.Index(
+                fields=["doctor", "updated_at"], name="session_doctor_updated_idx"
+            ),
+            models.Index(
+                fields=["patient", "updated_at"], name="session_patient_updated_idx"
+            ),
+        ]
+
     def __str__(self):
         return f"Doctor: {self.doctor} - Patient: ${self.patient}"
 
 
-class Assignment(models.Model):
+class Assignment(LoadedValuesMixin, models.Model):
     title = models.CharField(max_length=200)
     description = models.CharField(max_length=200)
     doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE)
@@ -86,6 +200,56 @@ class Assignment(models.Model):
         default=enums.AssignmentStatus.PENDING,
     )
     delivery_session = models.ForeignKey(Session, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # the owners, whose lists and syncs lose the assignment when it moves
+    tracked_fields = ("doctor_id", "patient_id")
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["patient", "status"], name="assignment_patient_status_idx"
+            ),
+            models.Index(
+                fields=["patient", "doctor", "status"],
+                name="assignment_pat_doc_status_idx",
+            ),
+            models.Index(
+                fields=["doctor", "updated_at"], name="assignment_doc_updated_idx"
+            ),
+            models.Index(
+                fields=["patient", "updated_at"], name="assignment_pat_updated_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title}"
+
+
+class Tombstone(models.Model):
+    """
+    Records a deleted row for the clients to delete it when they sync. The
+    doctor and the patient the row was synced to are kept as plain uuids, as
+    they may be the ones being deleted.
+    """
+
+    model = models.CharField(max_length=200, choices=enums.SyncedModel.choices())
+    object_id = models.BigIntegerField()
+    doctor_uuid = models.UUIDField(null=True)
+    patient_uuid = models.UUIDField(null=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["doctor_uuid", "deleted_at"],
+                name="tombstone_doctor_deleted_idx",
+            ),
+            models.Index(
+                fields=["patient_uuid", "deleted_at"],
+                name="tombstone_patient_deleted_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id}"
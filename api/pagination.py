@@ -0,0 +1,28 @@
+from rest_framework.pagination import CursorPagination
+
+
+class BaseCursorPagination(CursorPagination):
+    """
+    Keyset pagination with opaque cursors. Pages are found by filtering on the
+    ordering columns instead of counting or offsetting the rows, so they load
+    in the same time no matter how deep in the history they are.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class PatientCursorPagination(BaseCursorPagination):
+    ordering = "uuid"
+
+
+class SessionCursorPagination(BaseCursorPagination):
+    ordering = ("date", "id")
+
+
+class AssignmentCursorPagination(BaseCursorPagination):
+    ordering = "id"
+
+
+class AdviceCursorPagination(BaseCursorPagination):
+    ordering = "id"
@@ -1,6 +1,6 @@
 from rest_framework import permissions
 
-from . import models
+from . import roles
 
 
 class HasToken(permissions.BasePermission):
@@ -35,9 +35,7 @@ class IsDoctor(permissions.BasePermission):
     """
 
     def has_permission(self, request, view):
-        uid = request.user.uid
-        is_doctor = models.Doctor.objects.filter(pk=uid).exists()
-        return is_doctor
+        return roles.get_role(request.user).is_doctor
 
 
 class HasPatientInformation(permissions.BasePermission):
@@ -50,8 +48,7 @@ class HasPatientInformation(permissions.BasePermission):
         uid = request.user.uid
         pk = view.kwargs["pk"]
         if str(uid) != pk:
-            qs = models.Patient.objects.filter(pk=pk, doctors__pk=uid)
-            return qs.exists()
+            return roles.is_patient_doctor(pk, uid)
         return True
 
 
@@ -146,8 +143,7 @@ class IsInviteOwner(permissions.BasePermission):
     def has_permission(self, request, view):
         uid = request.user.uid
         pk = view.kwargs["pk"]
-        qs = models.Invite.objects.filter(pk=pk, patient__pk=uid)
-        return qs.exists()
+        return roles.is_invite_patient(pk, uid)
 
 
 class HasInviteInformation(permissions.BasePermission):
@@ -0,0 +1,78 @@
+import datetime
+
+from rest_framework.utils import encoders
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from . import models
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONEncoder(encoders.JSONEncoder):
+    """
+    DRF's encoder, but with datetimes in the same format the serializers use
+    """
+
+    def default(self, obj):
+        if isinstance(obj, datetime.datetime):
+            return obj.strftime(models.Session.DATE_FORMAT)
+        return super().default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Renders JSON with orjson when it is installed, which encodes the dicts,
+    lists, strings and UUIDs of the responses natively, falling back to
+    JSONEncoder for the rest. Without orjson, or when the output should be
+    indented, it renders just like DRF's JSONRenderer.
+    """
+
+    encoder_class = JSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            # the errors of list fields are keyed by the int index of the item
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+        # the same escaping JSONRenderer does, to output a strict javascript subset
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028")
+            ret = ret.replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Renders newline delimited JSON, one line per item of a list. Used by the
+    actions that stream their rows instead of paginating them.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def __init__(self):
+        self.json_renderer = FastJSONRenderer()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if not isinstance(data, list):
+            data = [data]
+        return b"".join(self.render_lines(data))
+
+    def render_lines(self, rows):
+        """Returns the encoded line of every row, ending with a newline"""
+        render = self.json_renderer.render
+        return [render(row) + b"\n" for row in rows]
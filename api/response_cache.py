@@ -0,0 +1,136 @@
+import functools
+import hashlib
+import time
+import uuid
+
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from . import caching, conditional
+
+# shorter than roles.CACHE_TIMEOUT, as the lists change much more often
+CACHE_TIMEOUT = 60 * 60
+# while a worker computes a missing entry, the other workers that need it wait
+# for it up to LOCK_WAIT seconds, and then compute it themselves
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2
+LOCK_POLL_INTERVAL = 0.05
+
+DOCTOR = "doctor"
+PATIENT = "patient"
+
+
+def _version_key(scope, pk):
+    return f"list-version:{scope}:{caching.normalize_pk(pk)}"
+
+
+def get_version(scope, pk):
+    """
+    Returns the version of the lists of the doctor or patient, which is part of
+    the key of their cached responses
+    """
+    key = _version_key(scope, pk)
+    version = cache.get(key)
+    if version is None:
+        # a local backend doesn't see the other workers drop the version, so
+        # it expires like any other value, which changes the ETags of the lists
+        cache.add(key, uuid.uuid4().hex, caching.timeout(None))
+        version = cache.get(key)
+    return version
+
+
+def list_version(request, scope, pk):
+    """
+    Returns the Version of a list of the doctor or patient, from the version of
+    their lists, so that it costs no query. A deleted row has no updated_at to
+    compare, so the Version has no last modified date.
+    """
+    parts = (request.get_full_path(), str(request.user.uid), get_version(scope, pk))
+    return conditional.Version(conditional.make_etag(request, *parts), None)
+
+
+def forget_lists(scope, pks):
+    """
+    Invalidates every cached list of the doctors or patients, by dropping
+    their versions
+    """
+    caching.forget(_version_key(scope, pk) for pk in pks if caching.normalize_pk(pk))
+
+
+def _entry_key(request, action, scope, pk):
+    """
+    The key of the response of the action, for the user, the target doctor or
+    patient and the query params, in the current version of the target lists
+    """
+    parts = (
+        request.build_absolute_uri(),
+        request.accepted_media_type,
+        str(request.user.uid),
+        get_version(scope, pk),
+    )
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return f"list:{action}:{caching.normalize_pk(pk)}:{digest}"
+
+
+def _cached_response(request, entry):
+    data, etag = entry
+    version = conditional.Version(etag, None)
+    response = conditional.not_modified(request, version)
+    if response is not None:
+        return response
+    return conditional.set_version(Response(data), version)
+
+
+def _wait_for(key):
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def cache_list(scope, uncached_params=()):
+    """
+    Caches the successful responses of a list action of a doctor or patient,
+    given by the pk of the url, until one of their lists change. Only one
+    worker computes a missing response, while the others wait for it.
+
+    The lists filtered by one of the uncached params, like the ones relative
+    to the current time, change without a write, so they are never cached.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(view, request, *args, **kwargs):
+            pk = kwargs["pk"]
+            uncached = any(request.query_params.get(p) for p in uncached_params)
+            if uncached or caching.normalize_pk(pk) is None:
+                return func(view, request, *args, **kwargs)
+            key = _entry_key(request, func.__name__, scope, pk)
+            entry = cache.get(key)
+            if entry is not None:
+                return _cached_response(request, entry)
+
+            lock_key = f"{key}:lock"
+            locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+            if not locked:
+                entry = _wait_for(key)
+                if entry is not None:
+                    return _cached_response(request, entry)
+            try:
+                response = func(view, request, *args, **kwargs)
+                etag = response.get("ETag")
+                if isinstance(response, Response) and response.status_code == 200:
+                    cache.set(
+                        key, (response.data, etag), caching.timeout(CACHE_TIMEOUT)
+                    )
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+            return response
+
+        return wrapper
+
+    return decorator
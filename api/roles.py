@@ -0,0 +1,176 @@
+from django.core.cache import cache
+from django.db import router
+from django.db.models import F, Value
+
+from . import caching, enums, models
+
+DOCTOR_FIELDS = [field.attname for field in models.Doctor._meta.concrete_fields]
+PATIENT_FIELDS = [field.attname for field in models.Patient._meta.concrete_fields]
+# the fields of both models, by name, selected by the role query
+COLUMNS = {
+    field.attname: field
+    for model in (models.Doctor, models.Patient)
+    for field in model._meta.concrete_fields
+}
+
+# entries are invalidated by the receivers in signals.py, the timeouts only
+# bound how long a missed invalidation can last
+CACHE_TIMEOUT = 60 * 60 * 24
+UNREGISTERED_CACHE_TIMEOUT = 60
+
+
+class Role:
+    """
+    The role of a user in the app, along with the Doctor or Patient instance
+    the user is registered as
+    """
+
+    def __init__(self, kind, instance=None):
+        self.kind = kind
+        self.instance = instance
+
+    @property
+    def is_doctor(self):
+        return self.kind == enums.UserRole.DOCTOR
+
+    @property
+    def is_patient(self):
+        return self.kind == enums.UserRole.PATIENT
+
+    @property
+    def is_registered(self):
+        return self.kind != enums.UserRole.UNREGISTERED
+
+    def __repr__(self):
+        return f"Role({self.kind}, {self.instance!r})"
+
+
+def _role_key(uid):
+    return f"role:{caching.normalize_pk(uid)}"
+
+
+def _patient_doctors_key(patient_pk):
+    return f"patient-doctors:{caching.normalize_pk(patient_pk)}"
+
+
+def _invite_patient_key(invite_pk):
+    return f"invite-patient:{invite_pk}"
+
+
+def resolve_role(uid):
+    """
+    Finds whether the uid belongs to a doctor or to a patient, loading the
+    instance in the same query. Roles are cached between requests, but the
+    unregistered ones only on a shared backend, as the user signing up on
+    another worker wouldn't forget them.
+    """
+    if caching.normalize_pk(uid) is None:
+        return Role(enums.UserRole.UNREGISTERED)
+    key = _role_key(uid)
+    role = cache.get(key)
+    if role is None:
+        role = _query_role(uid)
+        if role.is_registered:
+            cache.set(key, role, caching.timeout(CACHE_TIMEOUT))
+        elif caching.is_shared():
+            cache.set(key, role, UNREGISTERED_CACHE_TIMEOUT)
+    return role
+
+
+def forget_role(uid):
+    caching.forget([_role_key(uid)])
+
+
+def _columns(model, field_names):
+    """
+    The columns of the role query, in the same order for both models, where the
+    fields the model doesn't have are NULLs of the type of the other model's.
+    Every column is an expression, as values_list() moves the plain field names
+    before the expressions.
+    """
+    fields = {field.attname: field for field in model._meta.concrete_fields}
+    return [
+        F(name) if name in fields else Value(None, output_field=COLUMNS[name])
+        for name in field_names
+    ]
+
+
+def _query_role(uid):
+    names = list(COLUMNS)
+    doctors = models.Doctor.objects.filter(pk=uid).values_list(
+        *_columns(models.Doctor, names), Value(enums.UserRole.DOCTOR.value)
+    )
+    patients = models.Patient.objects.filter(pk=uid).values_list(
+        *_columns(models.Patient, names), Value(enums.UserRole.PATIENT.value)
+    )
+    rows = list(doctors.union(patients, all=True))
+    if not rows:
+        return Role(enums.UserRole.UNREGISTERED)
+
+    # a uid registered as both is treated as a doctor, like it always was
+    row = min(rows, key=lambda row: row[-1] != enums.UserRole.DOCTOR)
+    kind = enums.UserRole(row[-1])
+    if kind == enums.UserRole.DOCTOR:
+        model, field_names = models.Doctor, DOCTOR_FIELDS
+    else:
+        model, field_names = models.Patient, PATIENT_FIELDS
+    values = [row[names.index(name)] for name in field_names]
+    instance = model.from_db(router.db_for_read(model), field_names, values)
+    return Role(kind, instance)
+
+
+def get_role(user):
+    """
+    Returns the role of the authenticated user. Users that memoize their role,
+    like authentication.FirebaseUser, resolve it only once per request.
+    """
+    role = getattr(user, "role", None)
+    if isinstance(role, Role):
+        return role
+    return resolve_role(user.uid)
+
+
+def get_patient_doctor_ids(patient_pk):
+    """Returns the hex uuids of the doctors of the patient, cached between requests"""
+    if caching.normalize_pk(patient_pk) is None:
+        return frozenset()
+    key = _patient_doctors_key(patient_pk)
+    doctor_ids = cache.get(key)
+    if doctor_ids is None:
+        links = models.Patient.doctors.through.objects.filter(patient_id=patient_pk)
+        doctor_ids = frozenset(
+            doctor_id.hex for doctor_id in links.values_list("doctor_id", flat=True)
+        )
+        cache.set(key, doctor_ids, caching.timeout(CACHE_TIMEOUT))
+    return doctor_ids
+
+
+def is_patient_doctor(patient_pk, doctor_uid):
+    return caching.normalize_pk(doctor_uid) in get_patient_doctor_ids(patient_pk)
+
+
+def forget_patient_doctors(patient_pk):
+    caching.forget([_patient_doctors_key(patient_pk)])
+
+
+def get_invite_patient_id(invite_pk):
+    """Returns the hex uuid of the patient of the invite, or None if there's no invite"""
+    if not str(invite_pk).isdigit():
+        return None
+    key = _invite_patient_key(invite_pk)
+    patient_id = cache.get(key)
+    if patient_id is None:
+        invites = models.Invite.objects.filter(pk=invite_pk)
+        patient_id = invites.values_list("patient_id", flat=True).first()
+        patient_id = patient_id.hex if patient_id else ""
+        cache.set(key, patient_id, caching.timeout(CACHE_TIMEOUT))
+    return patient_id or None
+
+
+def is_invite_patient(invite_pk, patient_uid):
+    patient_id = get_invite_patient_id(invite_pk)
+    return patient_id is not None and patient_id == caching.normalize_pk(patient_uid)
+
+
+def forget_invite_patient(invite_pk):
+    caching.forget([_invite_patient_key(invite_pk)])
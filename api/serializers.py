@@ -1,6 +1,116 @@
-from rest_framework import serializers
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import permissions, serializers
 
-from . import models
+from . import enums, models, roles
+
+# a monthly package has at most one session a day
+MAX_GROUP_SESSIONS = 31
+MAX_STATUS_UPDATES = 100
+
+
+def parse_sparse_fields(value):
+    """
+    Parses a fields= query param, like "id,date,patient.name", into a tree of
+    field names. An empty subtree means every field of the nested serializer.
+    """
+    sparse_fields = {}
+    for path in value.split(","):
+        node = sparse_fields
+        for name in path.strip().split("."):
+            if name:
+                node = node.setdefault(name, {})
+    return sparse_fields
+
+
+def get_sparse_fields(request):
+    """Returns the tree of the fields= query param of a GET request, or None"""
+    if request is None or request.method not in permissions.SAFE_METHODS:
+        return None
+    value = request.query_params.get("fields")
+    return parse_sparse_fields(value) if value else None
+
+
+class SparseFieldsMixin:
+    """
+    Narrows the serialized fields to the ones in the fields= query param of GET
+    requests. The dotted names narrow the fields of nested serializers.
+    """
+
+    sparse_fields = None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        sparse_fields = self.get_sparse_fields()
+        if not sparse_fields:
+            return fields
+        for name in list(fields):
+            if name not in sparse_fields:
+                del fields[name]
+            elif isinstance(fields[name], SparseFieldsMixin):
+                fields[name].sparse_fields = sparse_fields[name]
+        return fields
+
+    def get_sparse_fields(self):
+        if self.sparse_fields is not None:
+            return self.sparse_fields
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            """Nested serializers are narrowed by their parent"""
+            return None
+        return get_sparse_fields(self.context.get("request"))
+
+
+class SparseColumns:
+    """
+    The model fields a serializer reads for a tree of sparse fields, to narrow
+    the queries of the serialized instances to them
+    """
+
+    def __init__(self, serializer_class, sparse_fields):
+        self.columns = self.relations = None
+        if sparse_fields:
+            serializer = serializer_class()
+            serializer.sparse_fields = sparse_fields
+            self.columns, self.relations = set(), set()
+            self._read(serializer, "")
+
+    def _read(self, serializer, prefix):
+        opts = serializer.Meta.model._meta
+        for field in serializer.fields.values():
+            try:
+                model_field = opts.get_field(field.source)
+            except FieldDoesNotExist:
+                continue
+            path = prefix + field.source
+            if model_field.many_to_many:
+                self.relations.add(path)
+            elif isinstance(field, serializers.BaseSerializer):
+                """
+                The relation and the nested pk are loaded even when none of the
+                nested columns are, as a deferred relation can't be selected
+                """
+                nested_pk = field.Meta.model._meta.pk
+                self.relations.add(path)
+                self.columns.update([path, f"{path}__{nested_pk.attname}"])
+                self._read(field, path + "__")
+            else:
+                self.columns.add(path)
+
+    def reads(self, relation):
+        return self.relations is None or relation in self.relations
+
+    def select_related(self, queryset, *relations):
+        relations = [relation for relation in relations if self.reads(relation)]
+        return queryset.select_related(*relations) if relations else queryset
+
+    def only(self, queryset, *columns):
+        """Defers the columns that are not read, except the given ones"""
+        if self.columns is None:
+            return queryset
+        return queryset.only(*self.columns, *columns)
 
 
 class SignUpRequestSerializer(serializers.Serializer):
@@ -12,13 +122,96 @@ class SignUpResponseSerializer(serializers.Serializer):
     user_uuid = serializers.UUIDField()
 
 
-class DoctorSerializer(serializers.ModelSerializer):
+class SessionGroupRequestSerializer(serializers.Serializer):
+    patient_id = serializers.UUIDField()
+    type = serializers.ChoiceField(
+        choices=enums.SessionType.choices(), default=enums.SessionType.MONTHLY
+    )
+    dates = serializers.ListField(
+        child=serializers.DateTimeField(),
+        min_length=1,
+        max_length=MAX_GROUP_SESSIONS,
+    )
+
+    def validate_patient_id(self, value):
+        if not roles.is_patient_doctor(value, self.context["doctor"].pk):
+            raise serializers.ValidationError("The patient is not with the doctor")
+        return value
+
+    def validate_dates(self, value):
+        """The sessions are indexed in the group by their dates"""
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError("The sessions must have different dates")
+        return sorted(value)
+
+
+class SessionStatusUpdateSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=enums.SessionStatus.choices())
+
+
+class AssignmentStatusUpdateSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=enums.AssignmentStatus.choices())
+
+
+class StatusUpdatesRequestSerializer(serializers.Serializer):
+    def validate_updates(self, value):
+        ids = [update["id"] for update in value]
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError("Each id must be updated only once")
+        return value
+
+
+class SessionStatusUpdatesRequestSerializer(StatusUpdatesRequestSerializer):
+    updates = SessionStatusUpdateSerializer(
+        many=True, allow_empty=False, max_length=MAX_STATUS_UPDATES
+    )
+
+
+class AssignmentStatusUpdatesRequestSerializer(StatusUpdatesRequestSerializer):
+    updates = AssignmentStatusUpdateSerializer(
+        many=True, allow_empty=False, max_length=MAX_STATUS_UPDATES
+    )
+
+
+class AdviceBroadcastRequestSerializer(serializers.Serializer):
+    message = serializers.CharField(max_length=200)
+    patient_ids = serializers.ListField(
+        child=serializers.UUIDField(), required=False, allow_empty=False
+    )
+
+    def validate(self, attrs):
+        """
+        Checks in one query that the patients are with the doctor, defaulting
+        to all of the doctor's patients
+        """
+        links = models.Patient.doctors.through.objects.filter(
+            doctor_id=self.context["doctor"].pk
+        )
+        patient_ids = attrs.get("patient_ids")
+        if patient_ids is not None:
+            links = links.filter(patient_id__in=set(patient_ids))
+        found_ids = set(links.values_list("patient_id", flat=True))
+        if patient_ids is None and not found_ids:
+            raise serializers.ValidationError(
+                {"patient_ids": "The doctor has no patients"}
+            )
+        if patient_ids is not None and found_ids != set(patient_ids):
+            raise serializers.ValidationError(
+                {"patient_ids": "Some of the patients are not with the doctor"}
+            )
+        attrs["patient_ids"] = sorted(found_ids)
+        return attrs
+
+
+class DoctorSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Doctor
-        fields = "__all__"
+        exclude = ["updated_at"]
 
 
-class SimpleDoctorSerializer(serializers.ModelSerializer):
+class SimpleDoctorSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Doctor
         fields = [
@@ -27,7 +220,7 @@ class SimpleDoctorSerializer(serializers.ModelSerializer):
         ]
 
 
-class PatientSerializer(serializers.ModelSerializer):
+class PatientSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     doctors = serializers.PrimaryKeyRelatedField(
         many=True,
         read_only=True,
@@ -36,10 +229,23 @@ class PatientSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = models.Patient
-        fields = "__all__"
+        exclude = ["updated_at"]
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, sparse_fields=None):
+        """Loads the doctors of the patients in bulk"""
+        columns = SparseColumns(cls, sparse_fields)
+        if columns.reads("doctors"):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "doctors",
+                    queryset=models.Doctor.objects.only("uuid").order_by("uuid"),
+                )
+            )
+        return columns.only(queryset)
 
 
-class InviteSerializer(serializers.ModelSerializer):
+class InviteSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     doctor = SimpleDoctorSerializer()
     patient = serializers.PrimaryKeyRelatedField(
         read_only=True,
@@ -48,10 +254,10 @@ class InviteSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = models.Invite
-        fields = "__all__"
+        exclude = ["updated_at"]
 
 
-class AdviceSerializer(serializers.ModelSerializer):
+class AdviceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     doctor = SimpleDoctorSerializer()
     patients = serializers.PrimaryKeyRelatedField(
         many=True,
@@ -61,20 +267,49 @@ class AdviceSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = models.Advice
-        fields = "__all__"
+        exclude = ["updated_at"]
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, sparse_fields=None):
+        """Loads the nested doctor and the patients of the advices in bulk"""
+        columns = SparseColumns(cls, sparse_fields)
+        queryset = columns.select_related(queryset, "doctor")
+        if columns.reads("patients"):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "patients",
+                    queryset=models.Patient.objects.only("uuid").order_by("uuid"),
+                )
+            )
+        return columns.only(queryset)
 
 
-class SessionSerializer(serializers.ModelSerializer):
+class SessionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     doctor = SimpleDoctorSerializer()
     patient = PatientSerializer()
     date = serializers.DateTimeField(format=models.Session.DATE_FORMAT)
 
     class Meta:
         model = models.Session
-        fields = "__all__"
+        exclude = ["updated_at"]
 
+    @classmethod
+    def setup_eager_loading(cls, queryset, sparse_fields=None):
+        """Loads the nested doctor and patient, with the patient doctors, in bulk"""
+        columns = SparseColumns(cls, sparse_fields)
+        queryset = columns.select_related(queryset, "doctor", "patient")
+        if columns.reads("patient__doctors"):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "patient__doctors",
+                    queryset=models.Doctor.objects.only("uuid").order_by("uuid"),
+                )
+            )
+        # the sessions are paginated and streamed by date
+        return columns.only(queryset, "date")
 
-class SimpleSessionSerializer(serializers.ModelSerializer):
+
+class SimpleSessionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     date = serializers.DateTimeField(format=models.Session.DATE_FORMAT)
 
     class Meta:
@@ -85,7 +320,7 @@ class SimpleSessionSerializer(serializers.ModelSerializer):
         ]
 
 
-class AssignmentSerializer(serializers.ModelSerializer):
+class AssignmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     doctor = SimpleDoctorSerializer()
     patient = serializers.PrimaryKeyRelatedField(
         read_only=True,
@@ -95,4 +330,11 @@ class AssignmentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = models.Assignment
-        fields = "__all__"
+        exclude = ["updated_at"]
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, sparse_fields=None):
+        """Loads the nested doctor and delivery session in the same query"""
+        columns = SparseColumns(cls, sparse_fields)
+        queryset = columns.select_related(queryset, "doctor", "delivery_session")
+        return columns.only(queryset)
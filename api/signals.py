@@ -0,0 +1,208 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import enums, models, response_cache, roles, sync
+
+SYNCED_MODELS = {
+    models.Session: enums.SyncedModel.SESSION,
+    models.Assignment: enums.SyncedModel.ASSIGNMENT,
+    models.Invite: enums.SyncedModel.INVITE,
+}
+
+
+def touch(queryset):
+    """Bumps the updated_at of the rows, whose representations changed"""
+    queryset.update(updated_at=timezone.now())
+
+
+def touch_patients(patient_pks):
+    touch(models.Patient.objects.filter(pk__in=patient_pks))
+    # the patient, with their doctors, is nested in their sessions
+    touch(models.Session.objects.filter(patient__in=patient_pks))
+
+
+def changed_links(action, pk_set, linked):
+    """
+    Returns the pks linked or unlinked by the m2m_changed action, loading the
+    ones about to be cleared from the linked manager, or None for the other
+    actions
+    """
+    if action in ("post_add", "post_remove"):
+        return pk_set
+    if action == "pre_clear":
+        return list(linked.values_list("pk", flat=True))
+    return None
+
+
+def patient_doctors_changed(patient_pks, doctor_pks):
+    """The doctors were linked to or unlinked from the patients"""
+    for patient_pk in patient_pks:
+        roles.forget_patient_doctors(patient_pk)
+    touch_patients(patient_pks)
+    # the patients, with their doctors, are nested in the lists of each of
+    # their doctors, not only of the ones linked or unlinked
+    links = models.Patient.doctors.through.objects.filter(patient__in=patient_pks)
+    doctor_pks = {*doctor_pks, *links.values_list("doctor_id", flat=True)}
+    response_cache.forget_lists(response_cache.DOCTOR, doctor_pks)
+    response_cache.forget_lists(response_cache.PATIENT, patient_pks)
+
+
+def advice_patients_changed(advice_pks, patient_pks, doctor_pks):
+    """The advices were linked to or unlinked from the patients"""
+    touch(models.Advice.objects.filter(pk__in=advice_pks))
+    # the advices, with their patients, are nested in the lists of each of
+    # their patients, not only of the ones linked or unlinked
+    links = models.Advice.patients.through.objects.filter(advice__in=advice_pks)
+    patient_pks = {*patient_pks, *links.values_list("patient_id", flat=True)}
+    response_cache.forget_lists(response_cache.DOCTOR, doctor_pks)
+    response_cache.forget_lists(response_cache.PATIENT, patient_pks)
+
+
+def role_of(sender):
+    return enums.UserRole.DOCTOR if sender is models.Doctor else enums.UserRole.PATIENT
+
+
+def user_saved(sender, instance, created):
+    roles.forget_role(instance.pk)
+    if created:
+        """Fails with an IntegrityError if the uid is already registered"""
+        models.Registration.objects.create(uuid=instance.pk, role=role_of(sender))
+
+
+@receiver(post_delete, sender=models.Doctor)
+@receiver(post_delete, sender=models.Patient)
+def user_deleted(sender, instance, **kwargs):
+    models.Registration.objects.filter(uuid=instance.pk, role=role_of(sender)).delete()
+    roles.forget_role(instance.pk)
+    if sender is models.Patient:
+        roles.forget_patient_doctors(instance.pk)
+
+
+@receiver(post_save, sender=models.Doctor)
+def doctor_saved(sender, instance, created, **kwargs):
+    user_saved(sender, instance, created)
+    response_cache.forget_lists(response_cache.DOCTOR, [instance.pk])
+    if not created:
+        if instance.has_changed(*instance.tracked_fields):
+            """The doctor is nested in the synced rows"""
+            touch(models.Session.objects.filter(doctor=instance))
+            touch(models.Assignment.objects.filter(doctor=instance))
+            touch(models.Advice.objects.filter(doctor=instance))
+            touch(models.Invite.objects.filter(doctor=instance))
+        # the doctor is nested in the lists of their patients
+        patient_pks = instance.patient_set.values_list("pk", flat=True)
+        response_cache.forget_lists(response_cache.PATIENT, patient_pks)
+    instance.remember_loaded_values()
+
+
+@receiver(post_save, sender=models.Patient)
+def patient_saved(sender, instance, created, **kwargs):
+    user_saved(sender, instance, created)
+    response_cache.forget_lists(response_cache.PATIENT, [instance.pk])
+    if not created:
+        if instance.has_changed(*instance.tracked_fields):
+            touch(models.Session.objects.filter(patient=instance))
+        # the patient is nested in the lists of their doctors
+        doctor_pks = instance.doctors.values_list("pk", flat=True)
+        response_cache.forget_lists(response_cache.DOCTOR, doctor_pks)
+    instance.remember_loaded_values()
+
+
+@receiver(pre_delete, sender=models.Doctor)
+def doctor_deleting(sender, instance, **kwargs):
+    # the links are deleted by cascade, which doesn't send m2m_changed
+    patient_pks = list(instance.patient_set.values_list("pk", flat=True))
+    patient_doctors_changed(patient_pks, [instance.pk])
+
+
+@receiver(pre_delete, sender=models.Patient)
+def patient_deleting(sender, instance, **kwargs):
+    touch(instance.advice_set.all())
+    response_cache.forget_lists(response_cache.PATIENT, [instance.pk])
+    doctor_pks = instance.doctors.values_list("pk", flat=True)
+    response_cache.forget_lists(response_cache.DOCTOR, doctor_pks)
+
+
+@receiver(m2m_changed, sender=models.Patient.doctors.through)
+def patient_doctors_m2m_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    linked = instance.patient_set if reverse else instance.doctors
+    linked_pks = changed_links(action, pk_set, linked)
+    if linked_pks is None:
+        return
+    if reverse:
+        patient_doctors_changed(linked_pks, [instance.pk])
+    else:
+        patient_doctors_changed([instance.pk], linked_pks)
+
+
+@receiver(m2m_changed, sender=models.Advice.patients.through)
+def advice_patients_m2m_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    linked = instance.advice_set if reverse else instance.patients
+    linked_pks = changed_links(action, pk_set, linked)
+    if linked_pks is None:
+        return
+    if reverse:
+        links = [(advice_pk, instance.pk) for advice_pk in linked_pks]
+        advices = models.Advice.objects.filter(pk__in=linked_pks)
+        doctor_pks = advices.values_list("doctor_id", flat=True)
+        advice_patients_changed(linked_pks, [instance.pk], doctor_pks)
+    else:
+        links = [(instance.pk, patient_pk) for patient_pk in linked_pks]
+        advice_patients_changed([instance.pk], linked_pks, [instance.doctor_id])
+    if action != "post_add":
+        sync.bury_advice_links(links)
+
+
+@receiver(post_save, sender=models.Invite)
+def invite_saved(sender, instance, **kwargs):
+    roles.forget_invite_patient(instance.pk)
+
+
+@receiver(post_save, sender=models.Session)
+@receiver(post_save, sender=models.Assignment)
+def row_saved(sender, instance, created, **kwargs):
+    if sender is models.Session and not created:
+        """The session is nested in the assignments delivered in it"""
+        touch(models.Assignment.objects.filter(delivery_session=instance))
+    doctor_pks, patient_pks = [instance.doctor_id], [instance.patient_id]
+    if not created:
+        """The row may have moved away from its previous doctor or patient"""
+        previous_doctor_pk = instance.previous_value("doctor_id")
+        previous_patient_pk = instance.previous_value("patient_id")
+        if previous_doctor_pk or previous_patient_pk:
+            sync.bury_moved(
+                SYNCED_MODELS[sender], instance, previous_doctor_pk, previous_patient_pk
+            )
+            doctor_pks.append(previous_doctor_pk)
+            patient_pks.append(previous_patient_pk)
+    instance.remember_loaded_values()
+    response_cache.forget_lists(response_cache.DOCTOR, doctor_pks)
+    response_cache.forget_lists(response_cache.PATIENT, patient_pks)
+
+
+@receiver(post_delete, sender=models.Session)
+@receiver(post_delete, sender=models.Assignment)
+@receiver(post_delete, sender=models.Invite)
+def row_deleted(sender, instance, **kwargs):
+    sync.bury(SYNCED_MODELS[sender], instance)
+    if sender is models.Invite:
+        roles.forget_invite_patient(instance.pk)
+        return
+    response_cache.forget_lists(response_cache.DOCTOR, [instance.doctor_id])
+    response_cache.forget_lists(response_cache.PATIENT, [instance.patient_id])
+
+
+@receiver(post_save, sender=models.Advice)
+def advice_saved(sender, instance, **kwargs):
+    response_cache.forget_lists(response_cache.DOCTOR, [instance.doctor_id])
+    patient_pks = instance.patients.values_list("pk", flat=True)
+    response_cache.forget_lists(response_cache.PATIENT, patient_pks)
+
+
+@receiver(pre_delete, sender=models.Advice)
+def advice_deleting(sender, instance, **kwargs):
+    patient_pks = list(instance.patients.values_list("pk", flat=True))
+    sync.bury_advice(instance, patient_pks)
+    response_cache.forget_lists(response_cache.DOCTOR, [instance.doctor_id])
+    response_cache.forget_lists(response_cache.PATIENT, patient_pks)
@@ -0,0 +1,164 @@
+from django.utils.timezone import datetime, now, timedelta, timezone
+from rest_framework import exceptions as rest_exceptions
+
+from . import enums, mappers, models, serializers
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# the updated_at of a row is set when it is saved, before its transaction is
+# committed, so the next sync reads again the rows changed in the last seconds
+# of the previous one, in case they were only committed after it
+SYNC_MARGIN = timedelta(seconds=5)
+
+# the keys of the synced models in the response
+KEYS = {
+    enums.SyncedModel.SESSION: "sessions",
+    enums.SyncedModel.ASSIGNMENT: "assignments",
+    enums.SyncedModel.ADVICE: "advices",
+    enums.SyncedModel.INVITE: "invites",
+}
+
+
+def make_token(moment):
+    """Returns the sync token of the moment, in microseconds since the epoch"""
+    return str((moment - EPOCH) // timedelta(microseconds=1))
+
+
+def parse_token(value):
+    """Returns the moment of the sync token, or None when there's no token"""
+    if not value:
+        return None
+    try:
+        if not value.isdigit():
+            raise ValueError(value)
+        return EPOCH + timedelta(microseconds=int(value))
+    except (ValueError, OverflowError):
+        raise rest_exceptions.ParseError("Invalid sync token")
+
+
+def get_querysets(role):
+    """Returns the querysets of the rows synced to the doctor or patient"""
+    pk = role.instance.pk
+    if role.is_doctor:
+        return {
+            enums.SyncedModel.SESSION: models.Session.objects.filter(doctor=pk),
+            enums.SyncedModel.ASSIGNMENT: models.Assignment.objects.filter(doctor=pk),
+            enums.SyncedModel.ADVICE: models.Advice.objects.filter(doctor=pk),
+            enums.SyncedModel.INVITE: models.Invite.objects.filter(doctor=pk),
+        }
+    return {
+        enums.SyncedModel.SESSION: models.Session.objects.filter(patient=pk),
+        enums.SyncedModel.ASSIGNMENT: models.Assignment.objects.filter(patient=pk),
+        enums.SyncedModel.ADVICE: models.Advice.objects.filter(patients=pk),
+        enums.SyncedModel.INVITE: models.Invite.objects.filter(patient=pk),
+    }
+
+
+def get_changes(role, since=None):
+    """
+    Returns the rows synced to the doctor or patient that changed since the
+    moment, along with the ids of the ones deleted since then, and the token
+    of the next sync. Without a moment, every row is returned.
+    """
+    token = make_token(now() - SYNC_MARGIN)
+    changes = {"token": token}
+    for model, queryset in get_querysets(role).items():
+        if since is not None:
+            queryset = queryset.filter(updated_at__gte=since)
+        changes[KEYS[model]] = represent(model, queryset.order_by("pk"))
+    deleted = get_deleted(role, since)
+    for key, ids in deleted.items():
+        """An advice unlinked from the patient may have been linked again"""
+        changed_ids = {row["id"] for row in changes[key]}
+        deleted[key] = [pk for pk in ids if pk not in changed_ids]
+    changes["deleted"] = deleted
+    return changes
+
+
+def represent(model, queryset):
+    if model == enums.SyncedModel.INVITE:
+        invites = queryset.select_related("doctor")
+        return serializers.InviteSerializer(invites, many=True).data
+    serializer_class = {
+        enums.SyncedModel.SESSION: serializers.SessionSerializer,
+        enums.SyncedModel.ASSIGNMENT: serializers.AssignmentSerializer,
+        enums.SyncedModel.ADVICE: serializers.AdviceSerializer,
+    }[model]
+    mapper = mappers.get_mapper(serializer_class)
+    return mapper.to_representation(mapper.values(queryset))
+
+
+def get_deleted(role, since):
+    """Returns the ids of the rows deleted since the moment, by synced model"""
+    deleted = {key: [] for key in KEYS.values()}
+    if since is None:
+        return deleted
+    if role.is_doctor:
+        tombstones = models.Tombstone.objects.filter(doctor_uuid=role.instance.pk)
+    else:
+        tombstones = models.Tombstone.objects.filter(patient_uuid=role.instance.pk)
+    tombstones = tombstones.filter(deleted_at__gte=since)
+    rows = tombstones.order_by("model", "object_id").values_list("model", "object_id")
+    for model, object_id in rows.distinct():
+        deleted[KEYS[model]].append(object_id)
+    return deleted
+
+
+def bury(model, instance):
+    """Records the tombstone of a deleted row, for its doctor and its patient"""
+    models.Tombstone.objects.create(
+        model=model,
+        object_id=instance.pk,
+        doctor_uuid=instance.doctor_id,
+        patient_uuid=instance.patient_id,
+    )
+
+
+def bury_moved(model, instance, doctor_pk, patient_pk):
+    """
+    Records the tombstone of a row moved to another doctor or patient, for the
+    previous ones only
+    """
+    models.Tombstone.objects.create(
+        model=model,
+        object_id=instance.pk,
+        doctor_uuid=doctor_pk,
+        patient_uuid=patient_pk,
+    )
+
+
+def bury_advice(advice, patient_pks):
+    """Records the tombstones of a deleted advice, for its doctor and its patients"""
+    tombstones = [
+        models.Tombstone(
+            model=enums.SyncedModel.ADVICE,
+            object_id=advice.pk,
+            doctor_uuid=advice.doctor_id,
+            patient_uuid=patient_pk,
+        )
+        for patient_pk in patient_pks
+    ]
+    if not tombstones:
+        tombstones.append(
+            models.Tombstone(
+                model=enums.SyncedModel.ADVICE,
+                object_id=advice.pk,
+                doctor_uuid=advice.doctor_id,
+            )
+        )
+    models.Tombstone.objects.bulk_create(tombstones)
+
+
+def bury_advice_links(links):
+    """
+    Records the tombstones of the advices unlinked from the patients, for the
+    patients only, from the (advice pk, patient pk) pairs
+    """
+    models.Tombstone.objects.bulk_create(
+        models.Tombstone(
+            model=enums.SyncedModel.ADVICE,
+            object_id=advice_pk,
+            patient_uuid=patient_pk,
+        )
+        for advice_pk, patient_pk in links
+    )
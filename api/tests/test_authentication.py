@@ -1,14 +1,21 @@
 import os
+import time
 from unittest import mock
 
-from django.test import RequestFactory, TestCase
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
 
-from .. import exceptions
+from .. import authentication, exceptions
 from ..authentication import FirebaseAuthentication
+from ..verifiers import SignedTokenVerifier
 
 
+@override_settings(
+    FIREBASE_AUTHENTICATION={"VERIFIER": "api.verifiers.RemoteFirebaseTokenVerifier"}
+)
 class FirebaseAuthenticationTestCase(TestCase):
     def setUp(self) -> None:
+        authentication.token_cache.clear()
         token = os.environ.get("DUMMY_FIREBASE_TOKEN")
         self.token_header = {"HTTP_AUTHORIZATION": "Bearer " + token}
         self.firebase_user = {"uid": "12345"}
@@ -52,3 +59,82 @@ class FirebaseAuthenticationTestCase(TestCase):
         user = auth.authenticate(request)
         expected_return = (self.firebase_user, None)
         self.assertEqual(user, expected_return)
+
+
+@override_settings(
+    FIREBASE_AUTHENTICATION={
+        "VERIFIER": "api.verifiers.SignedTokenVerifier",
+        "ALLOW_SIGNED_TOKENS": True,
+    }
+)
+class TokenCacheAuthenticationTestCase(TestCase):
+    def setUp(self):
+        authentication.token_cache.clear()
+
+    def authenticate(self, token):
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION="Bearer " + token)
+        return FirebaseAuthentication().authenticate(request)
+
+    def test_verified_token_is_not_verified_again(self):
+        token = SignedTokenVerifier.create_token("12345", "1234567890")
+        with mock.patch.object(
+            SignedTokenVerifier, "verify", wraps=SignedTokenVerifier().verify
+        ) as verify:
+            first_user, _ = self.authenticate(token)
+            second_user, _ = self.authenticate(token)
+        self.assertEqual(verify.call_count, 1)
+        self.assertEqual(second_user.uid, first_user.uid)
+        self.assertEqual(second_user.phone_number, first_user.phone_number)
+
+    @override_settings(
+        FIREBASE_AUTHENTICATION={
+            "VERIFIER": "api.verifiers.SignedTokenVerifier",
+            "ALLOW_SIGNED_TOKENS": True,
+            "TOKEN_CACHE": False,
+        }
+    )
+    def test_disabled_token_cache_verifies_every_time(self):
+        token = SignedTokenVerifier.create_token("12345", "1234567890")
+        with mock.patch.object(
+            SignedTokenVerifier, "verify", wraps=SignedTokenVerifier().verify
+        ) as verify:
+            self.authenticate(token)
+            self.authenticate(token)
+        self.assertEqual(verify.call_count, 2)
+
+
+class TokenCacheTestCase(TestCase):
+    def setUp(self):
+        self.token_cache = authentication.TokenCache()
+        self.expires_at = time.time() + 3600
+
+    def test_cached_token_returns_identity(self):
+        self.token_cache.set("token", "12345", "1234567890", self.expires_at)
+        self.assertEqual(self.token_cache.get("token"), ("12345", "1234567890"))
+        self.assertIsNone(self.token_cache.get("other_token"))
+
+    def test_expired_token_is_not_returned(self):
+        self.token_cache.set("token", "12345", "1234567890", self.expires_at)
+        with mock.patch("time.time", return_value=self.expires_at + 1):
+            self.assertIsNone(self.token_cache.get("token"))
+
+    def test_already_expired_token_is_not_cached(self):
+        self.token_cache.set("token", "12345", "1234567890", time.time() - 1)
+        self.assertIsNone(self.token_cache.get("token"))
+
+    @override_settings(FIREBASE_AUTHENTICATION={"TOKEN_CACHE_SIZE": 2})
+    def test_least_recently_used_token_is_evicted(self):
+        self.token_cache.set("token1", "1", "1", self.expires_at)
+        self.token_cache.set("token2", "2", "2", self.expires_at)
+        self.token_cache.get("token1")
+        self.token_cache.set("token3", "3", "3", self.expires_at)
+        self.assertIsNone(self.token_cache.get("token2"))
+        self.assertEqual(self.token_cache.get("token1"), ("1", "1"))
+        self.assertEqual(self.token_cache.get("token3"), ("3", "3"))
+
+    @override_settings(FIREBASE_AUTHENTICATION={"TOKEN_CACHE_ALIAS": "default"})
+    def test_shared_cache_is_used_by_other_processes(self):
+        self.addCleanup(cache.clear)
+        self.token_cache.set("token", "12345", "1234567890", self.expires_at)
+        other_process_cache = authentication.TokenCache()
+        self.assertEqual(other_process_cache.get("token"), ("12345", "1234567890"))
@@ -0,0 +1,33 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from model_mommy import mommy
+
+from .. import caching, models, roles
+
+SHARED_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"},
+}
+
+
+class TimeoutTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_local_backend_caps_the_timeouts(self):
+        self.assertEqual(caching.timeout(None), caching.LOCAL_CACHE_TIMEOUT)
+        self.assertEqual(caching.timeout(60 * 60 * 24), caching.LOCAL_CACHE_TIMEOUT)
+        self.assertEqual(caching.timeout(10), 10)
+
+    @override_settings(CACHES=SHARED_CACHES)
+    def test_shared_backend_keeps_the_timeouts(self):
+        self.assertIsNone(caching.timeout(None))
+        self.assertEqual(caching.timeout(60 * 60 * 24), 60 * 60 * 24)
+
+    def test_roles_are_cached_with_the_capped_timeout(self):
+        doctor = mommy.make(models.Doctor)
+        with mock.patch.object(cache, "set", wraps=cache.set) as set_value:
+            roles.resolve_role(doctor.pk)
+        timeout = set_value.call_args.args[2]
+        self.assertEqual(timeout, caching.LOCAL_CACHE_TIMEOUT)
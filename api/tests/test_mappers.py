@@ -0,0 +1,85 @@
+import io
+import json
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from model_mommy import mommy
+
+from .. import enums, mappers, models, serializers
+
+
+class MapperTestCase(TestCase):
+    def setUp(self):
+        self.doctors = mommy.make(models.Doctor, _quantity=3)
+        self.patients = mommy.make(models.Patient, _quantity=3)
+        self.patients[0].doctors.add(*self.doctors)
+        self.patients[1].doctors.add(self.doctors[1])
+        group = mommy.make(
+            models.SessionGroup, doctor=self.doctors[0], patient=self.patients[0]
+        )
+        now = timezone.now()
+        self.sessions = [
+            mommy.make(
+                models.Session,
+                doctor=self.doctors[i % 3],
+                patient=self.patients[i % 3],
+                date=now + timezone.timedelta(days=i, microseconds=i),
+                status=list(enums.SessionStatus)[i % len(enums.SessionStatus)],
+                group_id=group if i % 2 else None,
+                group_index=i if i % 2 else None,
+            )
+            for i in range(6)
+        ]
+        for i, session in enumerate(self.sessions):
+            mommy.make(
+                models.Assignment,
+                doctor=session.doctor,
+                patient=session.patient,
+                delivery_session=session,
+                status=enums.AssignmentStatus.DONE
+                if i % 2
+                else enums.AssignmentStatus.PENDING,
+            )
+        mommy.make(models.Advice, doctor=self.doctors[0], patients=self.patients)
+        mommy.make(models.Advice, doctor=self.doctors[1], patients=[self.patients[2]])
+        mommy.make(models.Advice, doctor=self.doctors[2])
+
+    def assertMapsLikeTheSerializer(self, serializer_class):
+        queryset = serializer_class.Meta.model.objects.order_by("pk")
+        serialized = serializer_class(
+            serializer_class.setup_eager_loading(queryset), many=True
+        ).data
+        mapper = mappers.get_mapper(serializer_class)
+        mapped = mapper.to_representation(mapper.values(queryset))
+        self.assertEqual(json.dumps(mapped), json.dumps(serialized))
+
+    def test_sessions_are_mapped_like_the_serializer(self):
+        self.assertMapsLikeTheSerializer(serializers.SessionSerializer)
+
+    def test_assignments_are_mapped_like_the_serializer(self):
+        self.assertMapsLikeTheSerializer(serializers.AssignmentSerializer)
+
+    def test_advices_are_mapped_like_the_serializer(self):
+        self.assertMapsLikeTheSerializer(serializers.AdviceSerializer)
+
+    def test_dates_are_mapped_in_the_current_timezone(self):
+        with timezone.override("America/Sao_Paulo"):
+            self.assertMapsLikeTheSerializer(serializers.SessionSerializer)
+            self.assertMapsLikeTheSerializer(serializers.AssignmentSerializer)
+
+    def test_mapping_runs_a_query_per_many_relation(self):
+        mapper = mappers.get_mapper(serializers.SessionSerializer)
+        with self.assertNumQueries(2):
+            mapper.to_representation(mapper.values(models.Session.objects.all()))
+
+    def test_only_the_read_only_list_serializers_are_mapped(self):
+        self.assertIsNone(mappers.get_mapper(serializers.DoctorSerializer))
+
+    def test_benchmark_command_compares_every_mapped_serializer(self):
+        out = io.StringIO()
+        call_command("benchmark_mappers", rows=20, repeat=1, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), len(mappers.MAPPED_SERIALIZERS))
+        self.assertTrue(lines[0].startswith("SessionSerializer: 20 rows"))
+        self.assertEqual(models.Doctor.objects.count(), len(self.doctors))
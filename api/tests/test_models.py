@@ -1,4 +1,6 @@
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from model_mommy import mommy
 
 from .. import models
@@ -9,6 +11,18 @@ class DoctorTestCase(TestCase):
         doctor = mommy.make(models.Doctor)
         self.assertEqual(str(doctor), f"{doctor.name} (CRP {doctor.crp})")
 
+    def test_deleted_doctor_loads_their_patients_once(self):
+        doctor = mommy.make(models.Doctor)
+        mommy.make(models.Patient, doctors=[doctor], _quantity=2)
+        with CaptureQueriesContext(connection) as context:
+            doctor.delete()
+        patient_lookups = [
+            query
+            for query in context.captured_queries
+            if query["sql"].startswith('SELECT "api_patient"."uuid"')
+        ]
+        self.assertEqual(len(patient_lookups), 1)
+
 
 class PatientTestCase(TestCase):
     def test_string_method_should_return_correct_representation(self):
@@ -48,3 +62,22 @@ class AssignmentTestCase(TestCase):
     def test_string_method_should_return_correct_representation(self):
         assignment = mommy.make(models.Assignment)
         self.assertEqual(str(assignment), f"{assignment.title}")
+
+
+class RegistrationTestCase(TestCase):
+    def test_string_method_should_return_correct_representation(self):
+        doctor = mommy.make(models.Doctor)
+        registration = models.Registration.objects.get(pk=doctor.pk)
+        self.assertEqual(str(registration), f"{doctor.pk} (DOCTOR)")
+
+    def test_users_are_registered_with_their_role(self):
+        patient = mommy.make(models.Patient)
+        self.assertEqual(models.Registration.objects.get(pk=patient.pk).role, "PATIENT")
+        patient.delete()
+        self.assertFalse(models.Registration.objects.exists())
+
+    def test_uid_cant_be_registered_as_doctor_and_patient(self):
+        doctor = mommy.make(models.Doctor)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            mommy.make(models.Patient, uuid=doctor.pk)
+        self.assertFalse(models.Patient.objects.exists())
@@ -0,0 +1,66 @@
+import datetime
+import json
+import uuid
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from .. import models, renderers
+
+
+class FastJSONRendererTestCase(SimpleTestCase):
+    def setUp(self):
+        self.renderer = renderers.FastJSONRenderer()
+        self.date = datetime.datetime(2023, 7, 1, 14, 30, tzinfo=datetime.timezone.utc)
+        self.data = {
+            "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "date": self.date,
+            "day": self.date.date(),
+            "price": Decimal("10.50"),
+            "results": [{"id": 1, "message": "olá \u2028"}],
+            "errors": {1: ["Invalid date"]},
+        }
+        self.expected_data = {
+            "uuid": "12345678-1234-5678-1234-567812345678",
+            "date": self.date.strftime(models.Session.DATE_FORMAT),
+            "day": "2023-07-01",
+            "price": 10.5,
+            "results": [{"id": 1, "message": "olá \u2028"}],
+            "errors": {"1": ["Invalid date"]},
+        }
+
+    def test_renders_values_with_orjson(self):
+        if renderers.orjson is None:
+            self.skipTest("orjson is not installed")
+        rendered = self.renderer.render(self.data)
+        self.assertEqual(json.loads(rendered), self.expected_data)
+        self.assertNotIn("\u2028".encode(), rendered)
+
+    def test_renders_values_without_orjson(self):
+        with mock.patch.object(renderers, "orjson", None):
+            rendered = self.renderer.render(self.data)
+        self.assertEqual(json.loads(rendered), self.expected_data)
+        self.assertNotIn("\u2028".encode(), rendered)
+
+    def test_renders_indented_output_when_requested(self):
+        rendered = self.renderer.render({"results": [1]}, "application/json; indent=4")
+        self.assertEqual(rendered, b'{\n    "results": [\n        1\n    ]\n}')
+
+    def test_renders_nothing_for_no_data(self):
+        self.assertEqual(self.renderer.render(None), b"")
+
+
+class NDJSONRendererTestCase(SimpleTestCase):
+    def test_renders_one_line_per_item(self):
+        rendered = renderers.NDJSONRenderer().render(
+            [{"id": 1}, {"id": uuid.UUID(int=0)}]
+        )
+        self.assertEqual(
+            rendered,
+            b'{"id":1}\n{"id":"00000000-0000-0000-0000-000000000000"}\n',
+        )
+
+    def test_renders_a_single_object_as_one_line(self):
+        rendered = renderers.NDJSONRenderer().render({"detail": "Not found."})
+        self.assertEqual(rendered, b'{"detail":"Not found."}\n')
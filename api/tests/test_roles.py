@@ -0,0 +1,195 @@
+import uuid
+from datetime import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from model_mommy import mommy
+
+from .. import enums, models, roles
+from ..authentication import FirebaseUser
+
+
+class ResolveRoleTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_doctor_uid_resolves_doctor_in_a_single_query(self):
+        doctor = mommy.make(models.Doctor, crp="1234", pix_key="some_pix_key")
+        with self.assertNumQueries(1):
+            role = roles.resolve_role(doctor.pk)
+        self.assertTrue(role.is_doctor)
+        self.assertFalse(role.is_patient)
+        self.assertTrue(role.is_registered)
+        self.assertEqual(role.instance, doctor)
+        self.assertEqual(role.instance.crp, doctor.crp)
+        self.assertEqual(role.instance.pix_key, doctor.pix_key)
+
+    def test_patient_uid_resolves_patient_in_a_single_query(self):
+        patient = mommy.make(models.Patient)
+        with self.assertNumQueries(1):
+            role = roles.resolve_role(patient.pk)
+        self.assertTrue(role.is_patient)
+        self.assertFalse(role.is_doctor)
+        self.assertEqual(role.instance, patient)
+        self.assertEqual(role.instance.name, patient.name)
+        self.assertEqual(role.instance.phone_number, patient.phone_number)
+
+    def test_patient_instance_has_the_types_of_its_fields(self):
+        patient = mommy.make(models.Patient)
+        role = roles.resolve_role(patient.pk)
+        self.assertIsInstance(role.instance.updated_at, datetime)
+        self.assertEqual(role.instance.updated_at, patient.updated_at)
+        self.assertEqual(role.instance.pk, patient.pk)
+
+    def test_unknown_uid_resolves_unregistered(self):
+        mommy.make(models.Doctor)
+        mommy.make(models.Patient)
+        with self.assertNumQueries(1):
+            role = roles.resolve_role(uuid.uuid4())
+        self.assertEqual(role.kind, enums.UserRole.UNREGISTERED)
+        self.assertFalse(role.is_registered)
+        self.assertIsNone(role.instance)
+
+    def test_unregistered_role_is_not_cached_on_a_local_backend(self):
+        """A user signing up on another worker wouldn't forget it"""
+        uid = uuid.uuid4()
+        roles.resolve_role(uid)
+        with self.assertNumQueries(1):
+            role = roles.resolve_role(uid)
+        self.assertFalse(role.is_registered)
+
+    @mock.patch.object(roles.caching, "is_shared", return_value=True)
+    def test_unregistered_role_is_cached_on_a_shared_backend(self, is_shared):
+        uid = uuid.uuid4()
+        roles.resolve_role(uid)
+        with self.assertNumQueries(0):
+            role = roles.resolve_role(uid)
+        self.assertFalse(role.is_registered)
+
+    def test_resolved_instance_can_be_saved(self):
+        doctor = mommy.make(models.Doctor)
+        role = roles.resolve_role(doctor.pk)
+        role.instance.name = "some_other_name"
+        role.instance.save()
+        self.assertEqual(
+            models.Doctor.objects.get(pk=doctor.pk).name, "some_other_name"
+        )
+
+
+class GetRoleTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_firebase_user_resolves_role_once(self):
+        doctor = mommy.make(models.Doctor)
+        user = FirebaseUser(str(doctor.pk), doctor.phone_number)
+        with self.assertNumQueries(1):
+            first_role = roles.get_role(user)
+            second_role = roles.get_role(user)
+        self.assertIs(first_role, second_role)
+        self.assertTrue(first_role.is_doctor)
+
+    def test_other_users_resolve_role(self):
+        patient = mommy.make(models.Patient)
+        user = mock.MagicMock(uid=patient.pk)
+        role = roles.get_role(user)
+        self.assertTrue(role.is_patient)
+
+
+class RoleCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_resolved_role_is_cached_between_requests(self):
+        doctor = mommy.make(models.Doctor)
+        roles.resolve_role(doctor.pk)
+        with self.assertNumQueries(0):
+            role = roles.resolve_role(doctor.pk)
+        self.assertTrue(role.is_doctor)
+
+    def test_registering_user_invalidates_cached_role(self):
+        uid = uuid.uuid4()
+        self.assertFalse(roles.resolve_role(uid).is_registered)
+        mommy.make(models.Patient, uuid=uid)
+        self.assertTrue(roles.resolve_role(uid).is_patient)
+
+    def test_updating_user_invalidates_cached_role(self):
+        doctor = mommy.make(models.Doctor)
+        roles.resolve_role(doctor.pk)
+        doctor.name = "some_other_name"
+        doctor.save()
+        self.assertEqual(roles.resolve_role(doctor.pk).instance.name, doctor.name)
+
+    def test_deleting_user_invalidates_cached_role(self):
+        patient = mommy.make(models.Patient)
+        roles.resolve_role(patient.pk)
+        patient_pk = patient.pk
+        patient.delete()
+        self.assertFalse(roles.resolve_role(patient_pk).is_registered)
+
+
+class PatientDoctorsCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.doctor = mommy.make(models.Doctor)
+        self.patient = mommy.make(models.Patient)
+
+    def test_patient_doctors_are_cached_between_requests(self):
+        self.patient.doctors.add(self.doctor)
+        self.assertTrue(roles.is_patient_doctor(self.patient.pk, self.doctor.pk))
+        with self.assertNumQueries(0):
+            is_doctor = roles.is_patient_doctor(str(self.patient.pk), self.doctor.pk)
+        self.assertTrue(is_doctor)
+
+    def test_adding_doctor_invalidates_cached_doctors(self):
+        self.assertFalse(roles.is_patient_doctor(self.patient.pk, self.doctor.pk))
+        self.patient.doctors.add(self.doctor)
+        self.assertTrue(roles.is_patient_doctor(self.patient.pk, self.doctor.pk))
+
+    def test_adding_patient_to_doctor_invalidates_cached_doctors(self):
+        self.assertFalse(roles.is_patient_doctor(self.patient.pk, self.doctor.pk))
+        self.doctor.patient_set.add(self.patient)
+        self.assertTrue(roles.is_patient_doctor(self.patient.pk, self.doctor.pk))
+
+    def test_removing_doctor_invalidates_cached_doctors(self):
+        self.patient.doctors.add(self.doctor)
+        self.assertTrue(roles.is_patient_doctor(self.patient.pk, self.doctor.pk))
+        self.patient.doctors.remove(self.doctor)
+        self.assertFalse(roles.is_patient_doctor(self.patient.pk, self.doctor.pk))
+
+    def test_clearing_doctor_patients_invalidates_cached_doctors(self):
+        self.patient.doctors.add(self.doctor)
+        self.assertTrue(roles.is_patient_doctor(self.patient.pk, self.doctor.pk))
+        self.doctor.patient_set.clear()
+        self.assertFalse(roles.is_patient_doctor(self.patient.pk, self.doctor.pk))
+
+    def test_deleting_doctor_invalidates_cached_doctors(self):
+        self.patient.doctors.add(self.doctor)
+        self.assertTrue(roles.is_patient_doctor(self.patient.pk, self.doctor.pk))
+        doctor_pk = self.doctor.pk
+        self.doctor.delete()
+        self.assertFalse(roles.is_patient_doctor(self.patient.pk, doctor_pk))
+
+    def test_invalid_patient_pk_has_no_doctors(self):
+        self.assertFalse(roles.is_patient_doctor("not_a_uuid", self.doctor.pk))
+
+
+class InvitePatientCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_invite_patient_is_cached_between_requests(self):
+        invite = mommy.make(models.Invite)
+        self.assertTrue(roles.is_invite_patient(invite.pk, invite.patient.pk))
+        with self.assertNumQueries(0):
+            is_patient = roles.is_invite_patient(str(invite.pk), invite.patient.pk)
+        self.assertTrue(is_patient)
+        self.assertFalse(roles.is_invite_patient(invite.pk, uuid.uuid4()))
+
+    def test_deleting_invite_invalidates_cached_patient(self):
+        invite = mommy.make(models.Invite)
+        self.assertTrue(roles.is_invite_patient(invite.pk, invite.patient.pk))
+        invite_pk = invite.pk
+        invite.delete()
+        self.assertFalse(roles.is_invite_patient(invite_pk, invite.patient.pk))
@@ -0,0 +1,80 @@
+from django.test import TestCase
+from django.utils.timezone import datetime, timezone
+from model_mommy import mommy
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from .. import models, serializers
+
+
+class SparseFieldsTestCase(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.doctor = mommy.make(models.Doctor, name="Marcos")
+        self.patient = mommy.make(models.Patient, doctors=[self.doctor])
+        self.session = mommy.make(
+            models.Session,
+            doctor=self.doctor,
+            patient=self.patient,
+            date=datetime(2023, 7, 1, tzinfo=timezone.utc),
+        )
+
+    def serialize(self, request, instance, serializer_class, **kwargs):
+        context = {"request": Request(request)}
+        return serializer_class(instance, context=context, **kwargs).data
+
+    def test_fields_are_parsed_into_a_tree(self):
+        self.assertEqual(
+            serializers.parse_sparse_fields("id, date,patient.name,patient.uuid,,"),
+            {"id": {}, "date": {}, "patient": {"name": {}, "uuid": {}}},
+        )
+
+    def test_fields_narrow_the_serialized_fields(self):
+        request = self.factory.get("/", {"fields": "id,doctor,patient.name"})
+        data = self.serialize(request, self.session, serializers.SessionSerializer)
+        self.assertEqual(
+            data,
+            {
+                "id": self.session.id,
+                "doctor": {"uuid": str(self.doctor.pk), "name": "Marcos"},
+                "patient": {"name": self.patient.name},
+            },
+        )
+
+    def test_fields_narrow_every_item_of_a_list(self):
+        request = self.factory.get("/", {"fields": "uuid,name"})
+        data = self.serialize(
+            request, [self.doctor], serializers.DoctorSerializer, many=True
+        )
+        self.assertEqual(data, [{"uuid": str(self.doctor.pk), "name": "Marcos"}])
+
+    def test_fields_are_ignored_by_writes(self):
+        request = self.factory.put("/?fields=uuid")
+        data = self.serialize(request, self.doctor, serializers.DoctorSerializer)
+        self.assertIn("pix_key", data)
+
+    def test_columns_of_the_narrowed_fields(self):
+        columns = serializers.SparseColumns(
+            serializers.SessionSerializer,
+            {"id": {}, "doctor": {"name": {}}, "patient": {"doctors": {}}},
+        )
+        self.assertEqual(
+            columns.columns,
+            {
+                "id",
+                "doctor",
+                "doctor__uuid",
+                "doctor__name",
+                "patient",
+                "patient__uuid",
+            },
+        )
+        self.assertEqual(columns.relations, {"doctor", "patient", "patient__doctors"})
+        self.assertTrue(columns.reads("doctor"))
+        self.assertFalse(columns.reads("delivery_session"))
+
+    def test_every_column_is_read_without_fields(self):
+        columns = serializers.SparseColumns(serializers.SessionSerializer, None)
+        self.assertTrue(columns.reads("patient__doctors"))
+        queryset = models.Session.objects.all()
+        self.assertIs(columns.only(queryset), queryset)
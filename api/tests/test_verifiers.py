@@ -0,0 +1,247 @@
+import datetime
+import io
+import os
+import time
+from unittest import mock
+
+import firebase_admin
+import jwt
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from django.core import signing
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+
+from .. import authentication, exceptions, verifiers
+from ..authentication import FirebaseAuthentication, FirebaseUser
+
+
+def make_signing_key():
+    """Returns a private key and the PEM of a self-signed certificate for it"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "securetoken")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    return key, certificate.public_bytes(serialization.Encoding.PEM).decode()
+
+
+class FirebaseTokenVerifierTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.key, cls.certificate = make_signing_key()
+
+    def setUp(self):
+        self.project_id = verifiers.get_firebase_app().project_id
+        verifiers.public_keys.clear()
+        authentication.token_cache.clear()
+        fetch = mock.patch.object(
+            verifiers.public_keys,
+            "_fetch",
+            return_value=({"key1": self.certificate}, 3600),
+        )
+        self.fetch = fetch.start()
+        self.addCleanup(fetch.stop)
+
+    def make_token(self, kid="key1", **claims):
+        now = int(time.time())
+        payload = {
+            "iss": f"https://securetoken.google.com/{self.project_id}",
+            "aud": self.project_id,
+            "sub": "12345",
+            "iat": now,
+            "exp": now + 3600,
+            "auth_time": now,
+            "phone_number": "1234567890",
+        }
+        payload.update(claims)
+        return jwt.encode(payload, self.key, algorithm="RS256", headers={"kid": kid})
+
+    def authenticate(self, token):
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION="Bearer " + token)
+        return FirebaseAuthentication().authenticate(request)
+
+    @mock.patch("firebase_admin.auth.get_user")
+    def test_token_with_phone_number_builds_user_from_claims(self, get_user):
+        user, _ = self.authenticate(self.make_token())
+        self.assertIsInstance(user, FirebaseUser)
+        self.assertEqual(user.uid, "12345")
+        self.assertEqual(user.phone_number, "1234567890")
+        get_user.assert_not_called()
+
+    @mock.patch("firebase_admin.auth.get_user")
+    def test_token_without_phone_number_falls_back_to_firebase(self, get_user):
+        firebase_user = mock.MagicMock(uid="12345", phone_number="1234567890")
+        get_user.return_value = firebase_user
+        user, _ = self.authenticate(self.make_token(phone_number=None))
+        self.assertEqual(user, firebase_user)
+        get_user.assert_called_once_with("12345", app=mock.ANY)
+
+    def test_token_for_other_project_should_fail(self):
+        with self.assertRaises(exceptions.InvalidAuthToken):
+            self.authenticate(self.make_token(aud="other-project"))
+
+    def test_token_from_other_issuer_should_fail(self):
+        with self.assertRaises(exceptions.InvalidAuthToken):
+            self.authenticate(self.make_token(iss="https://example.com"))
+
+    def test_expired_token_should_fail(self):
+        past = int(time.time()) - 7200
+        with self.assertRaises(exceptions.InvalidAuthToken):
+            self.authenticate(self.make_token(iat=past, exp=past + 3600))
+
+    def test_token_signed_by_unknown_key_should_fail(self):
+        other_key, _ = make_signing_key()
+        token = jwt.encode(
+            jwt.decode(self.make_token(), options={"verify_signature": False}),
+            other_key,
+            algorithm="RS256",
+            headers={"kid": "key1"},
+        )
+        with self.assertRaises(exceptions.InvalidAuthToken):
+            self.authenticate(token)
+
+    def test_public_keys_are_fetched_once_while_fresh(self):
+        self.authenticate(self.make_token())
+        self.authenticate(self.make_token(sub="67890"))
+        self.assertEqual(self.fetch.call_count, 1)
+
+    def test_unknown_key_id_refreshes_public_keys(self):
+        self.authenticate(self.make_token())
+        rotated_key, rotated_certificate = make_signing_key()
+        self.fetch.return_value = ({"key2": rotated_certificate}, 3600)
+        now = int(time.time())
+        token = jwt.encode(
+            {
+                "iss": f"https://securetoken.google.com/{self.project_id}",
+                "aud": self.project_id,
+                "sub": "12345",
+                "iat": now,
+                "exp": now + 3600,
+                "phone_number": "1234567890",
+            },
+            rotated_key,
+            algorithm="RS256",
+            headers={"kid": "key2"},
+        )
+        with mock.patch.object(verifiers.public_keys, "min_refresh_interval", 0):
+            user, _ = self.authenticate(token)
+        self.assertEqual(user.uid, "12345")
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_expired_public_keys_are_refreshed(self):
+        self.fetch.return_value = ({"key1": self.certificate}, 0)
+        with mock.patch.object(verifiers.public_keys, "min_max_age", 0):
+            self.authenticate(self.make_token())
+            self.authenticate(self.make_token(sub="67890"))
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_public_keys_without_max_age_are_kept_for_a_minimum_time(self):
+        self.fetch.return_value = ({"key1": self.certificate}, 0)
+        self.authenticate(self.make_token())
+        self.authenticate(self.make_token(sub="67890"))
+        self.assertEqual(self.fetch.call_count, 1)
+
+    def test_last_known_public_keys_are_kept_when_a_refresh_fails(self):
+        self.fetch.return_value = ({"key1": self.certificate}, 0)
+        with mock.patch.object(verifiers.public_keys, "min_max_age", 0):
+            self.authenticate(self.make_token())
+            self.fetch.side_effect = OSError("timed out")
+            user, _ = self.authenticate(self.make_token(sub="67890"))
+            self.assertEqual(user.uid, "67890")
+            """The next try waits for the refresh interval"""
+            self.authenticate(self.make_token(sub="13579"))
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_unavailable_public_keys_are_a_server_error(self):
+        self.fetch.side_effect = OSError("timed out")
+        with self.assertRaises(exceptions.PublicKeysUnavailable):
+            self.authenticate(self.make_token())
+
+
+class FirebaseAppTestCase(TestCase):
+    def setUp(self):
+        self.app = verifiers.get_firebase_app()
+
+    def test_app_is_initialized_once(self):
+        with mock.patch("firebase_admin.initialize_app") as initialize_app:
+            app = verifiers.get_firebase_app()
+        self.assertEqual(app, self.app)
+        initialize_app.assert_not_called()
+
+    def test_forked_process_initializes_its_own_app(self):
+        with mock.patch("os.getpid", return_value=os.getpid() + 1):
+            app = verifiers.get_firebase_app()
+        self.assertIsNot(app, self.app)
+        self.assertEqual(app.project_id, self.app.project_id)
+        self.assertIs(firebase_admin.get_app(), app)
+
+    def test_missing_private_key_fails_on_first_use(self):
+        with mock.patch.dict(os.environ, {"FIREBASE_PRIVATE_KEY": ""}):
+            with self.assertRaises(ImproperlyConfigured):
+                verifiers._get_credentials()
+
+
+@override_settings(
+    FIREBASE_AUTHENTICATION={
+        "VERIFIER": "api.verifiers.SignedTokenVerifier",
+        "ALLOW_SIGNED_TOKENS": True,
+    }
+)
+class SignedTokenVerifierTestCase(TestCase):
+    def setUp(self):
+        authentication.token_cache.clear()
+
+    def authenticate(self, token):
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION="Bearer " + token)
+        return FirebaseAuthentication().authenticate(request)
+
+    @mock.patch("firebase_admin.auth.get_user")
+    def test_signed_token_authenticates_without_firebase(self, get_user):
+        token = verifiers.SignedTokenVerifier.create_token("12345", "1234567890")
+        user, _ = self.authenticate(token)
+        self.assertIsInstance(user, FirebaseUser)
+        self.assertEqual(user.uid, "12345")
+        self.assertEqual(user.phone_number, "1234567890")
+        get_user.assert_not_called()
+
+    def test_expired_signed_token_should_fail(self):
+        token = verifiers.SignedTokenVerifier.create_token(
+            "12345", "1234567890", lifetime=-1
+        )
+        with self.assertRaises(exceptions.InvalidAuthToken):
+            self.authenticate(token)
+
+    def test_tampered_signed_token_should_fail(self):
+        token = signing.dumps(
+            {"uid": "12345", "exp": time.time() + 3600}, salt="some_other_salt"
+        )
+        with self.assertRaises(exceptions.InvalidAuthToken):
+            self.authenticate(token)
+
+    def test_create_signed_token_command_prints_valid_token(self):
+        out = io.StringIO()
+        call_command("create_signed_token", "12345", "1234567890", stdout=out)
+        token = out.getvalue().strip()
+        claims = verifiers.SignedTokenVerifier().verify(token)
+        self.assertEqual(claims["uid"], "12345")
+        self.assertEqual(claims["phone_number"], "1234567890")
+
+    def test_signed_tokens_must_be_allowed_when_debug_is_off(self):
+        with override_settings(FIREBASE_AUTHENTICATION={}):
+            with self.assertRaises(ImproperlyConfigured):
+                verifiers.SignedTokenVerifier()
+            with override_settings(DEBUG=True):
+                verifiers.SignedTokenVerifier()
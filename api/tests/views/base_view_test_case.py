@@ -1,12 +1,40 @@
 import uuid
 from unittest import mock
 
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
 from rest_framework.test import APITestCase
 
 
 class BaseViewTestCase(APITestCase):
     user = mock.MagicMock(uid=uuid.uuid4(), phone_number="1234567890")
+    patient_user = mock.MagicMock(uid=uuid.uuid4(), phone_number="0987654321")
     maxDiff = None
 
+    def setUp(self):
+        # the rows cached by a previous test were rolled back
+        cache.clear()
+
     def authenticate(self):
         self.client.force_authenticate(user=self.user)
+
+    def count_queries(self, url):
+        """Returns the number of queries of a successful GET to the url"""
+        # the rows added with bulk_create don't invalidate the cached responses
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def assertQueryCountIsFlat(self, url, grow, max_queries):
+        """
+        Asserts that a GET to the url runs the same queries, at most max_queries,
+        before and after grow() adds rows to it
+        """
+        queries = self.count_queries(url)
+        grow()
+        self.assertEqual(self.count_queries(url), queries)
+        self.assertLessEqual(queries, max_queries)
@@ -1,5 +1,8 @@
 import json
+from unittest import mock
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils.timezone import datetime, timedelta, timezone
 from model_mommy import mommy
@@ -123,3 +126,75 @@ class AdviceViewSetTestCase(BaseViewTestCase):
         self.assertEqual(
             response.data["detail"].code, rest_exceptions.PermissionDenied.default_code
         )
+
+
+class AdviceBroadcastTestCase(BaseViewTestCase):
+    url = reverse("advices-broadcast")
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate()
+        self.doctor = mommy.make(models.Doctor, uuid=self.user.uid)
+        self.patients = mommy.make(models.Patient, doctors=[self.doctor], _quantity=3)
+        self.other_patient = mommy.make(models.Patient)
+
+    def post(self, **data):
+        return self.client.post(
+            self.url, {"message": "Beba água", **data}, format="json"
+        )
+
+    def test_advice_is_broadcast_to_every_patient_of_the_doctor(self):
+        response = self.post()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        advice = models.Advice.objects.get()
+        self.assertEqual(advice.doctor, self.doctor)
+        self.assertEqual(set(advice.patients.all()), set(self.patients))
+        self.assertEqual(response.data["id"], advice.pk)
+        self.assertEqual(
+            response.data["patients"],
+            sorted(str(patient.pk) for patient in self.patients),
+        )
+
+    def test_advice_is_broadcast_to_the_chosen_patients(self):
+        patient_ids = [str(self.patients[0].pk), str(self.patients[2].pk)]
+        response = self.post(patient_ids=patient_ids)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["patients"], sorted(patient_ids))
+
+    def test_broadcast_runs_a_fixed_number_of_queries(self):
+        self.post()
+        with CaptureQueriesContext(connection) as few:
+            self.post()
+        mommy.make(models.Patient, doctors=[self.doctor], _quantity=20)
+        with CaptureQueriesContext(connection) as many:
+            response = self.post()
+        self.assertEqual(len(response.data["patients"]), 23)
+        self.assertEqual(len(many.captured_queries), len(few.captured_queries))
+
+    def test_advice_is_not_broadcast_to_patients_of_other_doctors(self):
+        patient_ids = [str(self.patients[0].pk), str(self.other_patient.pk)]
+        response = self.post(patient_ids=patient_ids)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("patient_ids", response.data)
+        self.assertFalse(models.Advice.objects.exists())
+
+    def test_doctor_without_patients_cant_broadcast(self):
+        self.doctor.patient_set.clear()
+        response = self.post()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_patient_cant_broadcast(self):
+        patient_user = mock.MagicMock(uid=self.other_patient.pk)
+        self.client.force_authenticate(user=patient_user)
+        response = self.post()
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_broadcast_advice_is_listed_for_the_patients(self):
+        patient = self.patients[0]
+        url = reverse("patients-advices", kwargs={"pk": str(patient.pk)})
+        self.client.force_authenticate(user=mock.MagicMock(uid=patient.pk))
+        self.assertEqual(self.client.get(url).data["results"], [])
+        self.authenticate()
+        self.post()
+        self.client.force_authenticate(user=mock.MagicMock(uid=patient.pk))
+        self.assertEqual(len(self.client.get(url).data["results"]), 1)
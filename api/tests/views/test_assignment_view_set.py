@@ -0,0 +1,50 @@
+from django.urls import reverse
+from django.utils.timezone import datetime, timezone
+from model_mommy import mommy
+from rest_framework import status
+
+from ... import enums, models
+from .base_view_test_case import BaseViewTestCase
+
+
+class AssignmentStatusUpdatesTestCase(BaseViewTestCase):
+    url = reverse("assignments-status")
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate()
+        self.patient = mommy.make(models.Patient, uuid=self.user.uid)
+        session = mommy.make(
+            models.Session,
+            patient=self.patient,
+            date=datetime(2023, 7, 3, 14, tzinfo=timezone.utc),
+        )
+        self.assignments = mommy.make(
+            models.Assignment,
+            doctor=session.doctor,
+            patient=self.patient,
+            delivery_session=session,
+            _quantity=3,
+        )
+
+    def test_patient_updates_the_statuses_of_their_assignments(self):
+        done, missed = enums.AssignmentStatus.DONE, enums.AssignmentStatus.MISSED
+        updates = [
+            {"id": self.assignments[0].pk, "status": done},
+            {"id": self.assignments[1].pk, "status": missed},
+        ]
+        response = self.client.post(self.url, {"updates": updates}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"],
+            [{**update, "updated": True} for update in updates],
+        )
+        statuses = models.Assignment.objects.order_by("pk").values_list(
+            "status", flat=True
+        )
+        self.assertEqual(list(statuses), [done, missed, enums.AssignmentStatus.PENDING])
+
+    def test_session_statuses_are_not_assignment_statuses(self):
+        updates = [{"id": self.assignments[0].pk, "status": "CONCLUDED"}]
+        response = self.client.post(self.url, {"updates": updates}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,149 @@
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.timezone import datetime, timedelta, timezone
+from model_mommy import mommy
+from rest_framework import status
+
+from ... import models, response_cache
+from .base_view_test_case import BaseViewTestCase
+
+
+class ConditionalRequestsTestCase(BaseViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.authenticate()
+        self.doctor = mommy.make(models.Doctor, uuid=self.user.uid)
+        self.patient = mommy.make(models.Patient, doctors=[self.doctor])
+        now = datetime.now().replace(tzinfo=timezone.utc)
+        self.sessions = [
+            mommy.make(
+                models.Session,
+                doctor=self.doctor,
+                patient=self.patient,
+                date=now + timedelta(days=i),
+            )
+            for i in range(3)
+        ]
+
+    def get(self, url, **headers):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, **headers)
+        self.queries = context.captured_queries
+        return response
+
+    def assertNotModified(self, url, etag):
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+        return response
+
+    def assertModified(self, url, etag):
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        return response
+
+    def test_not_modified_doctor_is_not_serialized_again(self):
+        url = reverse("doctors-detail", kwargs={"pk": str(self.doctor.pk)})
+        response = self.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Last-Modified", response)
+        etag = response["ETag"]
+
+        self.assertNotModified(url, etag)
+        self.assertEqual(len(self.queries), 1)
+        response = self.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.doctor.name = "Marcos"
+        self.doctor.save()
+        response = self.assertModified(url, etag)
+        self.assertEqual(response.data["name"], "Marcos")
+
+    def test_patient_is_modified_by_a_new_doctor(self):
+        url = reverse("patients-detail", kwargs={"pk": str(self.patient.pk)})
+        etag = self.get(url)["ETag"]
+        self.assertNotModified(url, etag)
+
+        self.patient.doctors.add(mommy.make(models.Doctor))
+        response = self.assertModified(url, etag)
+        self.assertEqual(len(response.data["doctors"]), 2)
+
+    def test_session_is_modified_by_its_nested_doctor(self):
+        url = reverse("sessions-detail", kwargs={"pk": self.sessions[0].pk})
+        etag = self.get(url)["ETag"]
+        self.assertNotModified(url, etag)
+
+        self.doctor.name = "Marcos"
+        self.doctor.save()
+        response = self.assertModified(url, etag)
+        self.assertEqual(response.data["doctor"]["name"], "Marcos")
+
+    def test_not_modified_session_list_is_not_serialized_again(self):
+        url = reverse("doctors-sessions", kwargs={"pk": str(self.doctor.pk)})
+        etag = self.get(url)["ETag"]
+
+        self.assertNotModified(url, etag)
+        self.assertEqual(len(self.queries), 0)
+        """Without a cached response, the version doesn't run any query either"""
+        with mock.patch.object(response_cache, "CACHE_TIMEOUT", 0):
+            etag = self.get(url)["ETag"]
+            self.assertNotModified(url, etag)
+        self.assertEqual(len(self.queries), 0)
+
+        self.sessions[0].status = "CONFIRMED"
+        self.sessions[0].save()
+        etag = self.assertModified(url, etag)["ETag"]
+
+        self.sessions[1].delete()
+        response = self.assertModified(url, etag)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_patient_list_is_modified_by_the_other_doctors_of_the_patient(self):
+        url = reverse("doctors-patients", kwargs={"pk": str(self.doctor.pk)})
+        etag = self.get(url)["ETag"]
+        self.assertNotModified(url, etag)
+
+        self.patient.doctors.add(mommy.make(models.Doctor))
+        response = self.assertModified(url, etag)
+        self.assertEqual(len(response.data["results"][0]["doctors"]), 2)
+
+    def test_session_list_versions_are_per_query(self):
+        url = reverse("patients-sessions", kwargs={"pk": str(self.patient.pk)})
+        etag = self.get(url)["ETag"]
+        response = self.get(url + "?page_size=1", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_advice_list_is_modified_by_new_patients(self):
+        advice = mommy.make(models.Advice, doctor=self.doctor, patients=[self.patient])
+        url = reverse("doctors-advices", kwargs={"pk": str(self.doctor.pk)})
+        etag = self.get(url)["ETag"]
+        self.assertNotModified(url, etag)
+
+        mommy.make(models.Patient, doctors=[self.doctor]).advice_set.add(advice)
+        response = self.assertModified(url, etag)
+        self.assertEqual(len(response.data["results"][0]["patients"]), 2)
+
+    def test_assignment_list_is_modified_by_its_delivery_session(self):
+        mommy.make(
+            models.Assignment,
+            doctor=self.doctor,
+            patient=self.patient,
+            delivery_session=self.sessions[0],
+        )
+        url = reverse("patients-assignments", kwargs={"pk": str(self.patient.pk)})
+        etag = self.get(url)["ETag"]
+        self.assertNotModified(url, etag)
+
+        self.sessions[0].date += timedelta(hours=1)
+        self.sessions[0].save()
+        self.assertModified(url, etag)
+
+    def test_upcoming_session_list_has_no_version(self):
+        url = reverse("patients-sessions", kwargs={"pk": str(self.patient.pk)})
+        response = self.get(url + "?upcoming=1")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("ETag", response)
@@ -1,6 +1,9 @@
 import json
 import uuid
+from unittest import mock
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils.timezone import datetime, timedelta, timezone
 from model_mommy import mommy
@@ -66,7 +69,7 @@ class DoctorViewSetTestCase(BaseViewTestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         patients_list = []
-        for patient in patients:
+        for patient in sorted(patients, key=lambda p: p.pk):
             patients_list.append(
                 {
                     "uuid": str(patient.pk),
@@ -76,7 +79,7 @@ class DoctorViewSetTestCase(BaseViewTestCase):
                 }
             )
         expected_data = json.dumps(patients_list)
-        self.assertEqual(response.data, expected_data)
+        self.assertEqual(json.dumps(response.data["results"]), expected_data)
 
     def test_user_has_uid_different_to_passed_pk_cant_list_sessions(self):
         self.authenticate()
@@ -145,7 +148,7 @@ class DoctorViewSetTestCase(BaseViewTestCase):
                 }
             )
         expected_data = json.dumps(sessions_list)
-        self.assertEqual(response.data, expected_data)
+        self.assertEqual(json.dumps(response.data["results"]), expected_data)
 
     def test_passed_bad_formatted_date_cant_list_sessions(self):
         self.authenticate()
@@ -184,7 +187,10 @@ class DoctorViewSetTestCase(BaseViewTestCase):
         )
         patient = mommy.make(models.Patient, name="Jaime", phone_number="1234")
         patient.doctors.add(doctor)
-        now = datetime.now().replace(tzinfo=timezone.utc)
+        """Noon, so that the sessions half an hour apart are on the same day"""
+        now = datetime.now().replace(
+            hour=12, minute=0, second=0, microsecond=0, tzinfo=timezone.utc
+        )
         mommy.make(  # session1
             models.Session,
             doctor=doctor,
@@ -216,7 +222,7 @@ class DoctorViewSetTestCase(BaseViewTestCase):
         )
         response = self.client.get(url)
         sessions_list = []
-        for session in [session2, session3]:
+        for session in [session3, session2]:
             sessions_list.append(
                 {
                     "id": session.id,
@@ -238,7 +244,245 @@ class DoctorViewSetTestCase(BaseViewTestCase):
                 }
             )
         expected_data = json.dumps(sessions_list)
-        self.assertEqual(response.data, expected_data)
+        self.assertEqual(json.dumps(response.data["results"]), expected_data)
+
+    def test_passed_date_filters_the_day_in_its_timezone(self):
+        self.authenticate()
+        doctor = mommy.make(models.Doctor, uuid=self.user.uid)
+        patient = mommy.make(models.Patient, doctors=[doctor])
+        dates = [
+            "2023-07-01T02:59:59+0000",
+            "2023-07-01T03:00:00+0000",
+            "2023-07-02T02:59:59+0000",
+            "2023-07-02T03:00:00+0000",
+        ]
+        sessions = [
+            mommy.make(
+                models.Session,
+                doctor=doctor,
+                patient=patient,
+                date=datetime.strptime(date, models.Session.DATE_FORMAT),
+            )
+            for date in dates
+        ]
+        url = utils.reverse_querystring(
+            self.sessions_url,
+            kwargs={"pk": str(doctor.pk)},
+            query_kwargs={"date": "2023-07-01T15:00:00-0300"},
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [session["id"] for session in response.data["results"]],
+            [sessions[1].id, sessions[2].id],
+        )
+
+    def test_passed_from_and_to_filter_sessions_in_the_range(self):
+        self.authenticate()
+        doctor = mommy.make(models.Doctor, uuid=self.user.uid)
+        patient = mommy.make(models.Patient, doctors=[doctor])
+        start = datetime(2023, 7, 3, tzinfo=timezone.utc)
+        sessions = models.Session.objects.bulk_create(
+            models.Session(
+                doctor=doctor, patient=patient, date=start + timedelta(days=i)
+            )
+            for i in range(-1, 9)
+        )
+
+        def list_session_ids(query_kwargs):
+            url = utils.reverse_querystring(
+                self.sessions_url,
+                kwargs={"pk": str(doctor.pk)},
+                query_kwargs=query_kwargs,
+            )
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return [session["id"] for session in response.data["results"]]
+
+        week = {
+            "from": start.strftime(models.Session.DATE_FORMAT),
+            "to": (start + timedelta(days=7)).strftime(models.Session.DATE_FORMAT),
+        }
+        self.assertEqual(
+            list_session_ids(week), [session.id for session in sessions[1:8]]
+        )
+        self.assertEqual(
+            list_session_ids({"from": week["to"]}),
+            [session.id for session in sessions[8:]],
+        )
+        self.assertEqual(list_session_ids({"to": week["from"]}), [sessions[0].id])
+
+    def test_passed_bad_formatted_range_cant_list_sessions(self):
+        self.authenticate()
+        doctor = mommy.make(models.Doctor, uuid=self.user.uid)
+        for param in ["from", "to"]:
+            url = utils.reverse_querystring(
+                self.sessions_url,
+                kwargs={"pk": str(doctor.pk)},
+                query_kwargs={param: "2023-07-01"},
+            )
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(
+                response.data["detail"].code, rest_exceptions.ParseError.default_code
+            )
+
+    def test_filtering_sessions_by_date_uses_the_doctor_date_index(self):
+        self.authenticate()
+        doctor = mommy.make(models.Doctor, uuid=self.user.uid)
+        url = utils.reverse_querystring(
+            self.sessions_url,
+            kwargs={"pk": str(doctor.pk)},
+            query_kwargs={"date": "2023-07-01T00:00:00+0000"},
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sql = context.captured_queries[0]["sql"]
+        self.assertIn("api_session", sql)
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn("session_doctor_date_idx", plan)
+
+    def test_listing_sessions_runs_the_same_queries_for_any_number_of_sessions(
+        self,
+    ):
+        self.authenticate()
+        doctor = mommy.make(models.Doctor, uuid=self.user.uid)
+        other_doctor = mommy.make(models.Doctor)
+        patients = mommy.make(models.Patient, _quantity=5)
+        for patient in patients:
+            patient.doctors.add(doctor, other_doctor)
+        url = reverse(self.sessions_url, kwargs={"pk": str(doctor.pk)})
+        mommy.make(models.Session, doctor=doctor, patient=patients[0])
+
+        def add_sessions():
+            now = datetime.now().replace(tzinfo=timezone.utc)
+            models.Session.objects.bulk_create(
+                models.Session(
+                    doctor=doctor,
+                    patient=patients[i % len(patients)],
+                    date=now + timedelta(hours=i),
+                )
+                for i in range(2000)
+            )
+
+        self.assertQueryCountIsFlat(url, add_sessions, 2)
+
+    def test_sessions_are_paginated_by_date_with_cursors(self):
+        self.authenticate()
+        doctor = mommy.make(models.Doctor, uuid=self.user.uid)
+        patient = mommy.make(models.Patient, doctors=[doctor])
+        now = datetime.now().replace(tzinfo=timezone.utc)
+        sessions = models.Session.objects.bulk_create(
+            models.Session(doctor=doctor, patient=patient, date=now - timedelta(days=i))
+            for i in range(15)
+        )
+        url = utils.reverse_querystring(
+            self.sessions_url,
+            kwargs={"pk": str(doctor.pk)},
+            query_kwargs={"page_size": 10},
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in context.captured_queries)
+        )
+        sessions_by_date = [session.id for session in reversed(sessions)]
+        first_page = [session["id"] for session in response.data["results"]]
+        self.assertEqual(first_page, sessions_by_date[:10])
+        self.assertIsNone(response.data["previous"])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        second_page = [session["id"] for session in response.data["results"]]
+        self.assertEqual(second_page, sessions_by_date[10:])
+        self.assertIsNone(response.data["next"])
+
+    def test_sessions_are_streamed_as_ndjson_when_requested(self):
+        self.authenticate()
+        doctor = mommy.make(models.Doctor, uuid=self.user.uid)
+        patient = mommy.make(models.Patient, doctors=[doctor])
+        now = datetime.now().replace(tzinfo=timezone.utc)
+        sessions = models.Session.objects.bulk_create(
+            models.Session(doctor=doctor, patient=patient, date=now - timedelta(days=i))
+            for i in range(250)
+        )
+        sessions_by_date = [session.id for session in reversed(sessions)]
+        url = reverse(self.sessions_url, kwargs={"pk": str(doctor.pk)})
+        stream_url = utils.reverse_querystring(
+            self.sessions_url,
+            kwargs={"pk": str(doctor.pk)},
+            query_kwargs={"stream": 1},
+        )
+
+        for response in [
+            self.client.get(url, HTTP_ACCEPT="application/x-ndjson"),
+            self.client.get(stream_url),
+        ]:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response.streaming)
+            self.assertEqual(response["Content-Type"], "application/x-ndjson")
+            with CaptureQueriesContext(connection) as context:
+                lines = b"".join(response.streaming_content).splitlines()
+            rows = [json.loads(line) for line in lines]
+            self.assertEqual([row["id"] for row in rows], sessions_by_date)
+            self.assertEqual(rows[0]["patient"]["doctors"], [str(doctor.pk)])
+            """Every chunk of rows loads its relations in the same queries"""
+            self.assertLessEqual(len(context.captured_queries), 6)
+
+    def test_passed_fields_narrow_the_sessions_and_their_query(self):
+        self.authenticate()
+        doctor = mommy.make(models.Doctor, uuid=self.user.uid, name="Marcos")
+        patient = mommy.make(models.Patient, doctors=[doctor])
+        session = mommy.make(models.Session, doctor=doctor, patient=patient)
+        url = utils.reverse_querystring(
+            self.sessions_url,
+            kwargs={"pk": str(doctor.pk)},
+            query_kwargs={"fields": "id,doctor.name"},
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"],
+            [{"id": session.id, "doctor": {"name": "Marcos"}}],
+        )
+        """Only the page, without the patient or its doctors"""
+        self.assertEqual(len(context.captured_queries), 1)
+        page_sql = context.captured_queries[-1]["sql"]
+        self.assertNotIn("api_patient", page_sql)
+        self.assertNotIn("pix_key", page_sql)
+        self.assertNotIn("status", page_sql)
+
+    def test_passed_fields_without_nested_columns_narrow_the_sessions(self):
+        self.authenticate()
+        doctor = mommy.make(models.Doctor, uuid=self.user.uid, name="Marcos")
+        patient = mommy.make(models.Patient, doctors=[doctor])
+        session = mommy.make(models.Session, doctor=doctor, patient=patient)
+        cases = {
+            "patient.doctors": [{"patient": {"doctors": [str(doctor.pk)]}}],
+            "doctor.nope": [{"doctor": {}}],
+            "date,patient.doctors,doctor.uuid": [
+                {
+                    "date": session.date.strftime(models.Session.DATE_FORMAT),
+                    "doctor": {"uuid": str(doctor.pk)},
+                    "patient": {"doctors": [str(doctor.pk)]},
+                }
+            ],
+        }
+        for fields, expected_results in cases.items():
+            with self.subTest(fields=fields):
+                url = utils.reverse_querystring(
+                    self.sessions_url,
+                    kwargs={"pk": str(doctor.pk)},
+                    query_kwargs={"fields": fields},
+                )
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.data["results"], expected_results)
 
     def test_user_has_uid_different_to_passed_pk_cant_list_advices(self):
         self.authenticate()
@@ -297,4 +541,83 @@ class DoctorViewSetTestCase(BaseViewTestCase):
                 }
             )
         expected_data = json.dumps(advices_list)
-        self.assertEqual(response.data, expected_data)
+        self.assertEqual(json.dumps(response.data["results"]), expected_data)
+
+    def test_listing_advices_runs_the_same_queries_for_any_number_of_advices(self):
+        self.authenticate()
+        doctor = mommy.make(models.Doctor, uuid=self.user.uid)
+        patients = mommy.make(models.Patient, _quantity=30)
+        url = reverse(self.advices_url, kwargs={"pk": str(doctor.pk)})
+        mommy.make(models.Advice, doctor=doctor, patients=patients[:1])
+
+        def add_advices():
+            advices = models.Advice.objects.bulk_create(
+                models.Advice(doctor=doctor, message=f"advice {i}") for i in range(200)
+            )
+            models.Advice.patients.through.objects.bulk_create(
+                models.Advice.patients.through(advice=advice, patient=patient)
+                for advice in advices
+                for patient in patients
+            )
+
+        self.assertQueryCountIsFlat(url, add_advices, 2)
+
+    def test_listing_patients_runs_the_same_queries_for_any_number_of_patients(
+        self,
+    ):
+        self.authenticate()
+        doctor = mommy.make(models.Doctor, uuid=self.user.uid)
+        other_doctor = mommy.make(models.Doctor)
+        url = reverse(self.patients_url, kwargs={"pk": str(doctor.pk)})
+        mommy.make(models.Patient, doctors=[doctor, other_doctor])
+
+        def add_patients():
+            for patient in mommy.make(models.Patient, _quantity=50):
+                patient.doctors.add(doctor, other_doctor)
+
+        self.assertQueryCountIsFlat(url, add_patients, 2)
+
+
+class DoctorHomeTestCase(BaseViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.authenticate()
+        self.doctor = mommy.make(models.Doctor, uuid=self.user.uid)
+        self.patient = mommy.make(models.Patient, doctors=[self.doctor])
+        self.url = reverse("doctors-home", kwargs={"pk": str(self.doctor.pk)})
+
+    def test_home_has_the_lists_of_the_doctor(self):
+        now = datetime.now(timezone.utc)
+        session = mommy.make(
+            models.Session,
+            doctor=self.doctor,
+            patient=self.patient,
+            date=now + timedelta(hours=1),
+        )
+        mommy.make(models.Session, doctor=self.doctor, date=now - timedelta(hours=1))
+        assignment = mommy.make(
+            models.Assignment,
+            doctor=self.doctor,
+            patient=self.patient,
+            delivery_session=session,
+        )
+        advices = mommy.make(models.Advice, doctor=self.doctor, _quantity=12)
+        invite = mommy.make(models.Invite, doctor=self.doctor)
+        mommy.make(models.Invite, patient=self.patient)
+
+        with self.assertNumQueries(6):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data
+        self.assertEqual([row["id"] for row in data["sessions"]], [session.pk])
+        self.assertEqual([row["id"] for row in data["assignments"]], [assignment.pk])
+        self.assertEqual(
+            [row["id"] for row in data["advices"]],
+            [advice.pk for advice in reversed(advices)][:10],
+        )
+        self.assertEqual([row["id"] for row in data["invites"]], [invite.pk])
+
+    def test_other_users_cant_see_the_doctor_home(self):
+        self.client.force_authenticate(user=mock.MagicMock(uid=self.patient.pk))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -1,11 +1,14 @@
 import json
+from unittest import mock
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from model_mommy import mommy
 from rest_framework import exceptions as rest_exceptions
 from rest_framework import status
 
-from ... import exceptions, models
+from ... import exceptions, models, roles
 from .base_view_test_case import BaseViewTestCase
 
 
@@ -163,3 +166,96 @@ class InviteViewSetTestCase(BaseViewTestCase):
         response = self.client.post(self.accept_url(invite.id), request_data)
         self.assertFalse(models.Invite.objects.filter(pk=invite.pk).exists())
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class CreateInviteTestCase(BaseViewTestCase):
+    url = reverse("invites-list")
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate()
+        self.doctor = mommy.make(models.Doctor, uuid=self.user.uid)
+        self.patient = mommy.make(models.Patient, phone_number="1234")
+
+    def post(self):
+        return self.client.post(self.url, {"phone_number": "1234"})
+
+    def test_invite_is_created_in_two_statements(self):
+        """The role is cached by the first request"""
+        self.client.post(self.url, {"phone_number": "4321"})
+        with CaptureQueriesContext(connection) as context:
+            response = self.post()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        statements = [
+            query["sql"]
+            for query in context.captured_queries
+            if "SAVEPOINT" not in query["sql"]
+        ]
+        self.assertEqual(len(statements), 2, statements)
+        invite = models.Invite.objects.get()
+        self.assertEqual((invite.doctor, invite.patient), (self.doctor, self.patient))
+
+    def test_doctor_cant_invite_the_same_patient_twice(self):
+        self.assertEqual(self.post().status_code, status.HTTP_201_CREATED)
+        response = self.post()
+        self.assertEqual(response.status_code, exceptions.InviteAlreadySent.status_code)
+        self.assertEqual(
+            response.data["detail"].code, exceptions.InviteAlreadySent.default_code
+        )
+        self.assertEqual(models.Invite.objects.count(), 1)
+
+    def test_other_doctors_can_invite_the_same_patient(self):
+        mommy.make(models.Invite, patient=self.patient)
+        self.assertEqual(self.post().status_code, status.HTTP_201_CREATED)
+        self.assertEqual(models.Invite.objects.count(), 2)
+
+
+class AcceptInviteTestCase(BaseViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.authenticate()
+        self.doctor = mommy.make(models.Doctor)
+        self.patient = mommy.make(models.Patient, uuid=self.user.uid)
+        self.invite = mommy.make(
+            models.Invite, doctor=self.doctor, patient=self.patient
+        )
+        self.url = reverse("invites-accept", kwargs={"pk": self.invite.pk})
+
+    def test_invite_patient_is_linked_to_the_doctor(self):
+        self.assertFalse(roles.is_patient_doctor(self.patient.pk, self.doctor.pk))
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(self.patient.doctors.all()), [self.doctor])
+        self.assertFalse(models.Invite.objects.exists())
+        self.assertTrue(roles.is_patient_doctor(self.patient.pk, self.doctor.pk))
+
+    def test_accept_runs_a_fixed_number_of_queries(self):
+        """
+        The owner check, then in a transaction: the invite lookup, its delete
+        and tombstone, the link lookup and insert, the updated_at of the
+        patient and their sessions, and the doctors whose lists are invalidated
+        """
+        with self.assertNumQueries(11):
+            response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_invite_is_accepted_only_once(self):
+        self.assertEqual(self.client.post(self.url).status_code, status.HTTP_200_OK)
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.patient.doctors.count(), 1)
+
+    def test_invite_consumed_by_a_concurrent_accept_links_nothing(self):
+        delete = models.Invite.delete
+
+        def delete_concurrently(invite):
+            """Another accept consumes the invite after it was looked up"""
+            models.Invite.objects.filter(pk=invite.pk).delete()
+            return delete(invite)
+
+        with mock.patch.object(
+            models.Invite, "delete", autospec=True, side_effect=delete_concurrently
+        ):
+            response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(self.patient.doctors.exists())
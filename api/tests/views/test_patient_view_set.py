@@ -1,4 +1,5 @@
 import json
+from unittest import mock
 
 from django.urls import reverse
 from django.utils.timezone import datetime, timedelta, timezone
@@ -185,7 +186,7 @@ class PatientViewSetTestCase(BaseViewTestCase):
                 }
             )
         expected_data = json.dumps(sessions_list)
-        self.assertEqual(response.data, expected_data)
+        self.assertEqual(json.dumps(response.data["results"]), expected_data)
 
     def test_doctor_passed_upcoming_as_true_can_list_its_sessions_with_patient_filtered_by_date_greater_than_now(
         self,
@@ -249,7 +250,7 @@ class PatientViewSetTestCase(BaseViewTestCase):
                 }
             )
         expected_data = json.dumps(sessions_list)
-        self.assertEqual(response.data, expected_data)
+        self.assertEqual(json.dumps(response.data["results"]), expected_data)
 
     def test_patient_passed_upcoming_as_true_can_list_sessions_filtered_by_date_greater_than_now(
         self,
@@ -292,7 +293,7 @@ class PatientViewSetTestCase(BaseViewTestCase):
         )
         response = self.client.get(url)
         sessions_list = []
-        for session in [session1, session2]:
+        for session in [session2, session1]:
             sessions_list.append(
                 {
                     "id": session.id,
@@ -314,7 +315,7 @@ class PatientViewSetTestCase(BaseViewTestCase):
                 }
             )
         expected_data = json.dumps(sessions_list)
-        self.assertEqual(response.data, expected_data)
+        self.assertEqual(json.dumps(response.data["results"]), expected_data)
 
     def test_patient_with_uid_equal_to_passed_pk_can_list_sessions(
         self,
@@ -353,7 +354,7 @@ class PatientViewSetTestCase(BaseViewTestCase):
         url = reverse(self.sessions_url, kwargs={"pk": str(patient.pk)})
         response = self.client.get(url)
         sessions_list = []
-        for session in [session1, session2, session3]:
+        for session in [session3, session2, session1]:
             sessions_list.append(
                 {
                     "id": session.id,
@@ -375,7 +376,30 @@ class PatientViewSetTestCase(BaseViewTestCase):
                 }
             )
         expected_data = json.dumps(sessions_list)
-        self.assertEqual(response.data, expected_data)
+        self.assertEqual(json.dumps(response.data["results"]), expected_data)
+
+    def test_listing_sessions_runs_the_same_queries_for_any_number_of_sessions(
+        self,
+    ):
+        self.authenticate()
+        doctors = mommy.make(models.Doctor, _quantity=3)
+        patient = mommy.make(models.Patient, uuid=self.user.uid)
+        patient.doctors.add(*doctors)
+        url = reverse(self.sessions_url, kwargs={"pk": str(patient.pk)})
+        mommy.make(models.Session, doctor=doctors[0], patient=patient)
+
+        def add_sessions():
+            now = datetime.now().replace(tzinfo=timezone.utc)
+            models.Session.objects.bulk_create(
+                models.Session(
+                    doctor=doctors[i % len(doctors)],
+                    patient=patient,
+                    date=now + timedelta(hours=i),
+                )
+                for i in range(2000)
+            )
+
+        self.assertQueryCountIsFlat(url, add_sessions, 2)
 
     def test_user_has_no_patient_information_cant_list_assignments(self):
         self.authenticate()
@@ -458,7 +482,7 @@ class PatientViewSetTestCase(BaseViewTestCase):
                 }
             )
         expected_data = json.dumps(ass_list)
-        self.assertEqual(response.data, expected_data)
+        self.assertEqual(json.dumps(response.data["results"]), expected_data)
 
     def test_doctor_passed_pending_as_true_can_list_its_own_assignments_with_patient(
         self,
@@ -526,7 +550,7 @@ class PatientViewSetTestCase(BaseViewTestCase):
                 }
             )
         expected_data = json.dumps(ass_list)
-        self.assertEqual(response.data, expected_data)
+        self.assertEqual(json.dumps(response.data["results"]), expected_data)
 
     def test_patient_has_patient_information_can_list_assignments(self):
         self.authenticate()
@@ -590,7 +614,7 @@ class PatientViewSetTestCase(BaseViewTestCase):
                 }
             )
         expected_data = json.dumps(ass_list)
-        self.assertEqual(response.data, expected_data)
+        self.assertEqual(json.dumps(response.data["results"]), expected_data)
 
     def test_patient_passed_pending_as_true_can_list_assignments_with_patient(
         self,
@@ -658,7 +682,7 @@ class PatientViewSetTestCase(BaseViewTestCase):
                 }
             )
         expected_data = json.dumps(ass_list)
-        self.assertEqual(response.data, expected_data)
+        self.assertEqual(json.dumps(response.data["results"]), expected_data)
 
     def test_user_has_no_patient_information_cant_list_advices(self):
         self.authenticate()
@@ -714,7 +738,7 @@ class PatientViewSetTestCase(BaseViewTestCase):
                 }
             )
         expected_data = json.dumps(advice_list)
-        self.assertEqual(response.data, expected_data)
+        self.assertEqual(json.dumps(response.data["results"]), expected_data)
 
     def test_patient_can_list_its_own_advices(
         self,
@@ -754,4 +778,131 @@ class PatientViewSetTestCase(BaseViewTestCase):
                 }
             )
         expected_data = json.dumps(advice_list)
-        self.assertEqual(response.data, expected_data)
+        self.assertEqual(json.dumps(response.data["results"]), expected_data)
+
+    def test_listing_assignments_runs_the_same_queries_for_any_number_of_assignments(
+        self,
+    ):
+        self.authenticate()
+        doctors = mommy.make(models.Doctor, _quantity=3)
+        patient = mommy.make(models.Patient, uuid=self.user.uid)
+        patient.doctors.add(*doctors)
+        sessions = [
+            mommy.make(models.Session, doctor=doctor, patient=patient)
+            for doctor in doctors
+        ]
+        url = reverse(self.assignments_url, kwargs={"pk": str(patient.pk)})
+        mommy.make(
+            models.Assignment,
+            doctor=doctors[0],
+            patient=patient,
+            delivery_session=sessions[0],
+        )
+
+        def add_assignments():
+            models.Assignment.objects.bulk_create(
+                models.Assignment(
+                    title=f"assignment {i}",
+                    description="description",
+                    doctor=doctors[i % len(doctors)],
+                    patient=patient,
+                    delivery_session=sessions[i % len(sessions)],
+                )
+                for i in range(500)
+            )
+
+        self.assertQueryCountIsFlat(url, add_assignments, 1)
+
+    def test_listing_advices_runs_the_same_queries_for_any_number_of_advices(self):
+        self.authenticate()
+        doctors = mommy.make(models.Doctor, _quantity=3)
+        patient = mommy.make(models.Patient, uuid=self.user.uid)
+        other_patients = mommy.make(models.Patient, _quantity=20)
+        url = reverse(self.advices_url, kwargs={"pk": str(patient.pk)})
+        mommy.make(models.Advice, doctor=doctors[0], patients=[patient])
+
+        def add_advices():
+            advices = models.Advice.objects.bulk_create(
+                models.Advice(doctor=doctors[i % len(doctors)], message=f"advice {i}")
+                for i in range(200)
+            )
+            models.Advice.patients.through.objects.bulk_create(
+                models.Advice.patients.through(advice=advice, patient=advice_patient)
+                for advice in advices
+                for advice_patient in [patient, *other_patients]
+            )
+
+        self.assertQueryCountIsFlat(url, add_advices, 2)
+
+
+class PatientHomeTestCase(BaseViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.authenticate()
+        self.patient = mommy.make(models.Patient, uuid=self.user.uid)
+        self.doctor = mommy.make(models.Doctor, patient_set=[self.patient])
+        self.url = reverse("patients-home", kwargs={"pk": str(self.patient.pk)})
+        now = datetime.now(timezone.utc)
+        self.past_session, self.next_session = [
+            mommy.make(
+                models.Session, doctor=self.doctor, patient=self.patient, date=date
+            )
+            for date in [now - timedelta(days=1), now + timedelta(days=1)]
+        ]
+        self.pending, _ = [
+            mommy.make(
+                models.Assignment,
+                doctor=self.doctor,
+                patient=self.patient,
+                delivery_session=self.next_session,
+                status=assignment_status,
+            )
+            for assignment_status in [
+                enums.AssignmentStatus.PENDING,
+                enums.AssignmentStatus.DONE,
+            ]
+        ]
+        self.advice = mommy.make(
+            models.Advice, doctor=self.doctor, patients=[self.patient]
+        )
+        self.invite = mommy.make(models.Invite, patient=self.patient)
+        mommy.make(models.Advice, doctor=self.doctor)
+
+    def ids(self, rows):
+        return [row["id"] for row in rows]
+
+    def test_home_has_the_lists_of_the_patient(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.ids(response.data["sessions"]), [self.next_session.pk])
+        self.assertEqual(self.ids(response.data["assignments"]), [self.pending.pk])
+        self.assertEqual(self.ids(response.data["advices"]), [self.advice.pk])
+        self.assertEqual(self.ids(response.data["invites"]), [self.invite.pk])
+        session_url = reverse("sessions-detail", kwargs={"pk": self.next_session.pk})
+        self.assertEqual(
+            response.data["sessions"][0], self.client.get(session_url).data
+        )
+
+    def test_home_runs_a_fixed_number_of_queries(self):
+        """
+        The sessions with the doctors of their patient, the assignments, the
+        advices with their patients and the invites
+        """
+        with self.assertNumQueries(6):
+            self.client.get(self.url)
+        models.Session.objects.bulk_create(
+            models.Session(
+                doctor=self.doctor,
+                patient=self.patient,
+                date=datetime.now(timezone.utc) + timedelta(hours=i + 1),
+            )
+            for i in range(20)
+        )
+        with self.assertNumQueries(6):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data["sessions"]), 10)
+
+    def test_doctor_cant_see_the_patient_home(self):
+        self.client.force_authenticate(user=mock.MagicMock(uid=self.doctor.pk))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
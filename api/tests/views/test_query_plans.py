@@ -0,0 +1,158 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.timezone import datetime, timedelta, timezone
+from model_mommy import mommy
+
+from ... import models, sync, utils
+from .base_view_test_case import BaseViewTestCase
+
+
+class QueryPlanTestCase(BaseViewTestCase):
+    """
+    Runs EXPLAIN QUERY PLAN on every query of the endpoints and fails if any of
+    them scans a whole table instead of searching an index
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.doctor = mommy.make(models.Doctor, uuid=self.user.uid)
+        self.patient = mommy.make(
+            models.Patient, uuid=self.patient_user.uid, doctors=[self.doctor]
+        )
+        now = datetime.now().replace(tzinfo=timezone.utc)
+        self.session = mommy.make(
+            models.Session, doctor=self.doctor, patient=self.patient, date=now
+        )
+        self.assignment = mommy.make(
+            models.Assignment,
+            doctor=self.doctor,
+            patient=self.patient,
+            delivery_session=self.session,
+        )
+        self.advice = mommy.make(
+            models.Advice, doctor=self.doctor, patients=[self.patient]
+        )
+        self.invite = mommy.make(
+            models.Invite, doctor=mommy.make(models.Doctor), patient=self.patient
+        )
+        self.date = now.strftime(models.Session.DATE_FORMAT)
+        self.tomorrow = (now + timedelta(days=1)).strftime(models.Session.DATE_FORMAT)
+
+    def url(self, name, query_kwargs=None, **kwargs):
+        return utils.reverse_querystring(name, kwargs=kwargs, query_kwargs=query_kwargs)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            return [str(row[-1]) for row in cursor.fetchall()]
+
+    def full_scans(self, sql):
+        details = self.explain(sql)
+        return [
+            detail
+            for detail in details
+            if detail.startswith("SCAN ") and "CONSTANT ROW" not in detail
+        ]
+
+    def assertNoFullScans(self, user, urls, method="get"):
+        self.client.force_authenticate(user=user)
+        for url in urls:
+            with CaptureQueriesContext(connection) as context:
+                response = getattr(self.client, method)(url)
+            self.assertLess(response.status_code, 400, url)
+            for query in context.captured_queries:
+                sql = query["sql"]
+                if not sql.startswith(("SELECT", "UPDATE", "DELETE")):
+                    continue
+                with self.subTest(url=url, sql=sql):
+                    self.assertEqual(self.full_scans(sql), [])
+
+    def assertUsesIndex(self, user, url, index_name):
+        self.client.force_authenticate(user=user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertLess(response.status_code, 400, url)
+        details = [
+            detail
+            for query in context.captured_queries
+            if query["sql"].startswith("SELECT")
+            for detail in self.explain(query["sql"])
+        ]
+        self.assertTrue(
+            any(f"USING INDEX {index_name} " in detail for detail in details), details
+        )
+
+    def test_doctor_endpoints_dont_scan_tables(self):
+        pk = str(self.doctor.pk)
+        self.assertNoFullScans(
+            self.user,
+            [
+                self.url("doctors-detail", pk=pk),
+                self.url("doctors-patients", pk=pk),
+                self.url("doctors-sessions", pk=pk),
+                self.url("doctors-sessions", {"date": self.date}, pk=pk),
+                self.url(
+                    "doctors-sessions", {"from": self.date, "to": self.tomorrow}, pk=pk
+                ),
+                self.url("doctors-advices", pk=pk),
+                self.url("doctors-home", pk=pk),
+            ],
+        )
+
+    def test_patient_endpoints_dont_scan_tables(self):
+        pk = str(self.patient.pk)
+        urls = [
+            self.url("patients-detail", pk=pk),
+            self.url("patients-sessions", pk=pk),
+            self.url("patients-sessions", {"upcoming": 1}, pk=pk),
+            self.url("patients-assignments", pk=pk),
+            self.url("patients-assignments", {"pending": 1}, pk=pk),
+            self.url("patients-advices", pk=pk),
+        ]
+        """Both the doctor and the patient views of the patient"""
+        self.assertNoFullScans(self.user, urls)
+        self.assertNoFullScans(self.patient_user, urls)
+        self.assertNoFullScans(self.patient_user, [self.url("patients-home", pk=pk)])
+
+    def test_patient_endpoints_search_the_composite_indexes(self):
+        pk = str(self.patient.pk)
+        sessions_url = self.url("patients-sessions", pk=pk)
+        self.assertUsesIndex(self.user, sessions_url, "session_pat_doc_date_idx")
+        self.assertUsesIndex(
+            self.patient_user, sessions_url, "session_patient_date_idx"
+        )
+        pending_url = self.url("patients-assignments", {"pending": 1}, pk=pk)
+        self.assertUsesIndex(self.user, pending_url, "assignment_pat_doc_status_idx")
+        self.assertUsesIndex(
+            self.patient_user, pending_url, "assignment_patient_status_idx"
+        )
+
+    def test_detail_endpoints_dont_scan_tables(self):
+        self.assertNoFullScans(
+            self.user,
+            [
+                self.url("sessions-detail", pk=self.session.pk),
+                self.url("assignments-detail", pk=self.assignment.pk),
+                self.url("advices-detail", pk=self.advice.pk),
+            ],
+        )
+        self.assertNoFullScans(
+            self.patient_user, [self.url("invites-detail", pk=self.invite.pk)]
+        )
+
+    def test_auth_and_invite_endpoints_dont_scan_tables(self):
+        self.assertNoFullScans(self.user, [reverse("login-user")], method="post")
+        self.assertNoFullScans(
+            self.patient_user,
+            [reverse("invites-accept", kwargs={"pk": self.invite.pk})],
+            method="post",
+        )
+
+    def test_sync_endpoint_searches_the_updated_at_indexes(self):
+        since = sync.make_token(datetime.now(timezone.utc) - timedelta(days=1))
+        url = self.url("sync", {"since": since})
+        self.assertNoFullScans(self.user, [url, reverse("sync")])
+        self.assertNoFullScans(self.patient_user, [url, reverse("sync")])
+        self.assertUsesIndex(self.user, url, "session_doctor_updated_idx")
+        self.assertUsesIndex(self.patient_user, url, "session_patient_updated_idx")
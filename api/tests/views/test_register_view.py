@@ -1,3 +1,5 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from model_mommy import mommy
 from rest_framework import exceptions as rest_exceptions
@@ -71,3 +73,49 @@ class RegisterUserTestCase(BaseViewTestCase):
         self.assertEqual(
             response.status_code, rest_exceptions.ValidationError.status_code
         )
+
+    def test_signup_is_a_single_insert_per_table(self):
+        self.authenticate()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.url, {"name": "Marcos", "is_doctor": True})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statements = [
+            query["sql"]
+            for query in context.captured_queries
+            if "SAVEPOINT" not in query["sql"]
+        ]
+        """The doctor and their registration"""
+        self.assertEqual(len(statements), 2, statements)
+        self.assertTrue(all(sql.startswith("INSERT") for sql in statements))
+
+    def test_retried_signup_is_already_registered(self):
+        self.authenticate()
+        request_data = {"name": "Marcos", "is_doctor": False}
+        self.assertEqual(
+            self.client.post(self.url, request_data).status_code, status.HTTP_200_OK
+        )
+        response = self.client.post(self.url, request_data)
+        self.assertEqual(
+            response.data["detail"].code, exceptions.UserAlreadyRegistered.default_code
+        )
+        self.assertEqual(models.Patient.objects.count(), 1)
+
+    def test_phone_number_already_registered_cant_signup(self):
+        doctor = mommy.make(models.Doctor, phone_number=self.user.phone_number)
+        self.authenticate()
+        response = self.client.post(self.url, {"name": "Marcos", "is_doctor": True})
+        self.assertEqual(
+            response.data["detail"].code, exceptions.UserAlreadyRegistered.default_code
+        )
+        self.assertEqual(list(models.Doctor.objects.all()), [doctor])
+        self.assertFalse(models.Registration.objects.filter(pk=self.user.uid).exists())
+
+    def test_uid_registered_concurrently_with_other_role_cant_signup(self):
+        """Another signup registered the uid but didn't commit its patient yet"""
+        models.Registration.objects.create(uuid=self.user.uid, role="PATIENT")
+        self.authenticate()
+        response = self.client.post(self.url, {"name": "Marcos", "is_doctor": True})
+        self.assertEqual(
+            response.data["detail"].code, exceptions.UserAlreadyRegistered.default_code
+        )
+        self.assertFalse(models.Doctor.objects.exists())
@@ -0,0 +1,187 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.timezone import datetime, timedelta, timezone
+from model_mommy import mommy
+from rest_framework import status
+
+from ... import models, response_cache
+from .base_view_test_case import BaseViewTestCase
+
+
+class ResponseCacheTestCase(BaseViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.doctor = mommy.make(models.Doctor, uuid=self.user.uid)
+        self.patient = mommy.make(
+            models.Patient, uuid=self.patient_user.uid, doctors=[self.doctor]
+        )
+        self.now = datetime.now().replace(tzinfo=timezone.utc)
+        self.session = mommy.make(
+            models.Session, doctor=self.doctor, patient=self.patient, date=self.now
+        )
+        self.doctor_sessions_url = reverse(
+            "doctors-sessions", kwargs={"pk": str(self.doctor.pk)}
+        )
+        self.patient_sessions_url = reverse(
+            "patients-sessions", kwargs={"pk": str(self.patient.pk)}
+        )
+
+    def get(self, url, user=None, **extra):
+        self.client.force_authenticate(user=user or self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, **extra)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.queries = context.captured_queries
+        return response
+
+    def test_repeated_list_is_served_from_the_cache(self):
+        response = self.get(self.doctor_sessions_url)
+        self.assertGreater(len(self.queries), 0)
+
+        cached_response = self.get(self.doctor_sessions_url)
+        self.assertEqual(len(self.queries), 0)
+        self.assertEqual(cached_response.content, response.content)
+        self.assertEqual(cached_response["ETag"], response["ETag"])
+
+    def test_lists_are_cached_per_viewer_and_query_params(self):
+        self.get(self.patient_sessions_url)
+        self.get(self.patient_sessions_url, user=self.patient_user)
+        self.assertGreater(len(self.queries), 0)
+        self.get(self.patient_sessions_url + "?page_size=1")
+        self.assertGreater(len(self.queries), 0)
+
+    def test_streamed_lists_are_not_cached(self):
+        url = self.doctor_sessions_url + "?stream=1"
+        self.assertTrue(self.get(url).streaming)
+        self.assertTrue(self.get(url).streaming)
+
+    def test_upcoming_sessions_are_not_cached(self):
+        url = self.patient_sessions_url + "?upcoming=1"
+        self.session.date = self.now + timedelta(hours=1)
+        self.session.save()
+        self.assertEqual(len(self.get(url).data["results"]), 1)
+
+        """The session starts, without any write"""
+        models.Session.objects.update(date=self.now - timedelta(hours=1))
+        self.assertEqual(len(self.get(url).data["results"]), 0)
+
+    def test_saved_sessions_invalidate_the_lists_of_their_doctor_and_patient(self):
+        self.get(self.doctor_sessions_url)
+        self.get(self.patient_sessions_url, user=self.patient_user)
+        mommy.make(
+            models.Session, doctor=self.doctor, patient=self.patient, date=self.now
+        )
+
+        response = self.get(self.doctor_sessions_url)
+        self.assertEqual(len(response.data["results"]), 2)
+        response = self.get(self.patient_sessions_url, user=self.patient_user)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_moved_sessions_invalidate_the_lists_of_their_previous_patient(self):
+        self.get(self.patient_sessions_url)
+        session = models.Session.objects.get(pk=self.session.pk)
+        session.patient = mommy.make(models.Patient, doctors=[self.doctor])
+        session.save()
+
+        response = self.get(self.patient_sessions_url)
+        self.assertEqual(response.data["results"], [])
+
+    def test_deleted_assignments_invalidate_the_patient_lists(self):
+        assignment = mommy.make(
+            models.Assignment,
+            doctor=self.doctor,
+            patient=self.patient,
+            delivery_session=self.session,
+        )
+        url = reverse("patients-assignments", kwargs={"pk": str(self.patient.pk)})
+        self.assertEqual(len(self.get(url).data["results"]), 1)
+        assignment.delete()
+        self.assertEqual(len(self.get(url).data["results"]), 0)
+
+    def test_advice_patients_invalidate_the_patient_lists(self):
+        advice = mommy.make(models.Advice, doctor=self.doctor)
+        url = reverse("patients-advices", kwargs={"pk": str(self.patient.pk)})
+        self.assertEqual(len(self.get(url).data["results"]), 0)
+        self.patient.advice_set.add(advice)
+        self.assertEqual(len(self.get(url).data["results"]), 1)
+        advice.patients.clear()
+        self.assertEqual(len(self.get(url).data["results"]), 0)
+
+    def test_patient_doctors_invalidate_the_doctor_lists(self):
+        url = reverse("doctors-patients", kwargs={"pk": str(self.doctor.pk)})
+        self.assertEqual(len(self.get(url).data["results"]), 1)
+        self.doctor.patient_set.remove(self.patient)
+        self.assertEqual(len(self.get(url).data["results"]), 0)
+
+    def test_new_doctor_invalidates_the_lists_of_the_other_doctors(self):
+        patients_url = reverse("doctors-patients", kwargs={"pk": str(self.doctor.pk)})
+        self.get(patients_url)
+        self.get(self.doctor_sessions_url)
+        other_doctor = mommy.make(models.Doctor)
+        self.patient.doctors.add(other_doctor)
+
+        doctor_pks = sorted([str(self.doctor.pk), str(other_doctor.pk)])
+        response = self.get(patients_url)
+        self.assertEqual(sorted(response.data["results"][0]["doctors"]), doctor_pks)
+        response = self.get(self.doctor_sessions_url)
+        doctors = response.data["results"][0]["patient"]["doctors"]
+        self.assertEqual(sorted(doctors), doctor_pks)
+
+    def test_new_advice_patient_invalidates_the_lists_of_the_other_patients(self):
+        advice = mommy.make(models.Advice, doctor=self.doctor, patients=[self.patient])
+        url = reverse("patients-advices", kwargs={"pk": str(self.patient.pk)})
+        self.get(url, user=self.patient_user)
+        other_patient = mommy.make(models.Patient, doctors=[self.doctor])
+        advice.patients.add(other_patient)
+
+        response = self.get(url, user=self.patient_user)
+        patient_pks = sorted([str(self.patient.pk), str(other_patient.pk)])
+        self.assertEqual(sorted(response.data["results"][0]["patients"]), patient_pks)
+
+    def test_renamed_doctor_invalidates_the_lists_of_their_patients(self):
+        self.get(self.patient_sessions_url, user=self.patient_user)
+        self.doctor.name = "Marcos"
+        self.doctor.save()
+        response = self.get(self.patient_sessions_url, user=self.patient_user)
+        self.assertEqual(response.data["results"][0]["doctor"]["name"], "Marcos")
+
+    def cache_entry_key(self, url):
+        """Returns the key of the cached response of the url"""
+        keys = []
+        entry_key = response_cache._entry_key
+
+        def record_key(*args):
+            keys.append(entry_key(*args))
+            return keys[-1]
+
+        with mock.patch.object(response_cache, "_entry_key", side_effect=record_key):
+            self.get(url)
+        return keys[0]
+
+    def test_worker_waits_for_the_list_another_worker_computes(self):
+        key = self.cache_entry_key(self.doctor_sessions_url)
+        entry = cache.get(key)
+        """Another worker is computing the list"""
+        cache.delete(key)
+        cache.add(f"{key}:lock", 1)
+
+        with mock.patch.object(
+            response_cache.time, "sleep", side_effect=lambda _: cache.set(key, entry)
+        ) as sleep:
+            self.get(self.doctor_sessions_url)
+        sleep.assert_called_once()
+        self.assertEqual(len(self.queries), 0)
+
+    def test_worker_computes_the_list_when_the_other_worker_takes_too_long(self):
+        key = self.cache_entry_key(self.doctor_sessions_url)
+        cache.delete(key)
+        cache.add(f"{key}:lock", 1)
+
+        with mock.patch.object(response_cache, "LOCK_WAIT", 0.1):
+            response = self.get(self.doctor_sessions_url)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertGreater(len(self.queries), 0)
@@ -0,0 +1,188 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.timezone import datetime, timedelta, timezone
+from model_mommy import mommy
+from rest_framework import status
+
+from ... import enums, models, serializers
+from .base_view_test_case import BaseViewTestCase
+
+
+class SessionGroupTestCase(BaseViewTestCase):
+    url = reverse("sessions-group")
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate()
+        self.doctor = mommy.make(models.Doctor, uuid=self.user.uid)
+        self.patient = mommy.make(
+            models.Patient, uuid=self.patient_user.uid, doctors=[self.doctor]
+        )
+        self.start = datetime(2023, 7, 3, 14, tzinfo=timezone.utc)
+
+    def dates(self, count):
+        return [
+            (self.start + timedelta(weeks=week)).strftime(models.Session.DATE_FORMAT)
+            for week in range(count)
+        ]
+
+    def post(self, **data):
+        body = {"patient_id": str(self.patient.pk), "dates": self.dates(4), **data}
+        return self.client.post(self.url, body, format="json")
+
+    def test_doctor_creates_a_group_of_sessions(self):
+        dates = self.dates(4)
+        response = self.post(dates=list(reversed(dates)))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        group = models.SessionGroup.objects.get()
+        self.assertEqual((group.doctor, group.patient), (self.doctor, self.patient))
+        sessions = models.Session.objects.filter(group_id=group).order_by("date")
+        self.assertEqual([session.group_index for session in sessions], [1, 2, 3, 4])
+        self.assertEqual([row["date"] for row in response.data], dates)
+        self.assertEqual(response.data[0]["type"], enums.SessionType.MONTHLY)
+        self.assertEqual(
+            response.data,
+            serializers.SessionSerializer(sessions, many=True).data,
+        )
+
+    def test_group_is_created_in_a_fixed_number_of_queries(self):
+        self.post(dates=self.dates(1))
+        with CaptureQueriesContext(connection) as few:
+            self.post(dates=self.dates(2))
+        with CaptureQueriesContext(connection) as many:
+            response = self.post(dates=self.dates(12))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(many.captured_queries), len(few.captured_queries))
+
+    def test_invalid_rows_create_no_session(self):
+        dates = self.dates(2)
+        response = self.post(dates=[dates[0], "tomorrow", dates[1], dates[0]])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("dates", response.data)
+
+        response = self.post(dates=[dates[0], dates[1], dates[0]])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.post(dates=[])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(models.SessionGroup.objects.exists())
+        self.assertFalse(models.Session.objects.exists())
+
+    def test_doctor_cant_create_sessions_of_other_patients(self):
+        self.patient = mommy.make(models.Patient)
+        response = self.post()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("patient_id", response.data)
+        self.assertFalse(models.Session.objects.exists())
+
+    def test_patient_cant_create_a_group(self):
+        self.client.force_authenticate(user=self.patient_user)
+        response = self.post()
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_created_sessions_are_listed(self):
+        url = reverse("doctors-sessions", kwargs={"pk": str(self.doctor.pk)})
+        self.assertEqual(self.client.get(url).data["results"], [])
+        self.post()
+        self.assertEqual(len(self.client.get(url).data["results"]), 4)
+
+
+class SessionStatusUpdatesTestCase(BaseViewTestCase):
+    url = reverse("sessions-status")
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate()
+        self.doctor = mommy.make(models.Doctor, uuid=self.user.uid)
+        self.patient = mommy.make(models.Patient, doctors=[self.doctor])
+        self.sessions = mommy.make(
+            models.Session,
+            doctor=self.doctor,
+            patient=self.patient,
+            date=datetime(2023, 7, 3, 14, tzinfo=timezone.utc),
+            _quantity=4,
+        )
+        self.other_session = mommy.make(
+            models.Session, date=datetime(2023, 7, 3, 14, tzinfo=timezone.utc)
+        )
+
+    def post(self, updates):
+        return self.client.post(self.url, {"updates": updates}, format="json")
+
+    def statuses(self):
+        return [
+            models.Session.objects.get(pk=session.pk).status
+            for session in self.sessions
+        ]
+
+    def test_statuses_are_updated_with_one_query_per_status(self):
+        concluded, canceled = (
+            enums.SessionStatus.CONCLUDED,
+            enums.SessionStatus.CANCELED,
+        )
+        updates = [
+            {"id": self.sessions[0].pk, "status": concluded},
+            {"id": self.sessions[1].pk, "status": canceled},
+            {"id": self.sessions[2].pk, "status": concluded},
+        ]
+        with CaptureQueriesContext(connection) as context:
+            response = self.post(updates)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"],
+            [{**update, "updated": True} for update in updates],
+        )
+        self.assertEqual(
+            self.statuses(),
+            [concluded, canceled, concluded, enums.SessionStatus.NOT_CONFIRMED],
+        )
+        sql = [query["sql"] for query in context.captured_queries]
+        self.assertEqual(len([s for s in sql if s.startswith("SELECT")]), 1)
+        self.assertEqual(len([s for s in sql if s.startswith("UPDATE")]), 2)
+
+    def test_rows_of_other_users_are_not_updated(self):
+        concluded = enums.SessionStatus.CONCLUDED
+        response = self.post(
+            [
+                {"id": self.sessions[0].pk, "status": concluded},
+                {"id": self.other_session.pk, "status": concluded},
+                {"id": self.other_session.pk + 100, "status": concluded},
+            ]
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        updated = [result["updated"] for result in response.data["results"]]
+        self.assertEqual(updated, [True, False, False])
+        self.other_session.refresh_from_db()
+        self.assertEqual(self.other_session.status, enums.SessionStatus.NOT_CONFIRMED)
+
+    def test_invalid_updates_update_no_session(self):
+        concluded = enums.SessionStatus.CONCLUDED
+        response = self.post(
+            [
+                {"id": self.sessions[0].pk, "status": concluded},
+                {"id": self.sessions[1].pk, "status": "DONE"},
+            ]
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.post(
+            [
+                {"id": self.sessions[0].pk, "status": concluded},
+                {"id": self.sessions[0].pk, "status": concluded},
+            ]
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.post([]).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn(concluded, self.statuses())
+
+    def test_updated_sessions_are_listed_with_their_new_status(self):
+        url = reverse("doctors-sessions", kwargs={"pk": str(self.doctor.pk)})
+        self.client.get(url)
+        since = models.Session.objects.get(pk=self.sessions[0].pk).updated_at
+        self.post([{"id": self.sessions[0].pk, "status": "CONCLUDED"}])
+
+        results = self.client.get(url).data["results"]
+        statuses = {row["id"]: row["status"] for row in results}
+        self.assertEqual(statuses[self.sessions[0].pk], "CONCLUDED")
+        session = models.Session.objects.get(pk=self.sessions[0].pk)
+        self.assertGreater(session.updated_at, since)
@@ -0,0 +1,228 @@
+import uuid
+from unittest import mock
+
+from django.urls import reverse
+from django.utils.timezone import datetime, timedelta, timezone
+from model_mommy import mommy
+from rest_framework import status
+
+from ... import exceptions, models, sync, utils
+from .base_view_test_case import BaseViewTestCase
+
+
+class SyncViewTestCase(BaseViewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.doctor = mommy.make(models.Doctor, uuid=self.user.uid)
+        self.patient = mommy.make(
+            models.Patient, uuid=self.patient_user.uid, doctors=[self.doctor]
+        )
+        self.session = mommy.make(
+            models.Session,
+            doctor=self.doctor,
+            patient=self.patient,
+            date=datetime.now(timezone.utc),
+        )
+        self.assignment = mommy.make(
+            models.Assignment,
+            doctor=self.doctor,
+            patient=self.patient,
+            delivery_session=self.session,
+        )
+        self.advice = mommy.make(
+            models.Advice, doctor=self.doctor, patients=[self.patient]
+        )
+        self.invite = mommy.make(
+            models.Invite, doctor=mommy.make(models.Doctor), patient=self.patient
+        )
+
+    def sync(self, user=None, since=None):
+        self.client.force_authenticate(user=user or self.user)
+        query_kwargs = {"since": since} if since is not None else None
+        url = utils.reverse_querystring("sync", query_kwargs=query_kwargs)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def now_token(self):
+        """The token of a sync that happened now, ignoring the margin"""
+        return sync.make_token(datetime.now(timezone.utc))
+
+    def ids(self, rows):
+        return [row["id"] for row in rows]
+
+    def test_unregistered_user_cant_sync(self):
+        self.client.force_authenticate(user=mock.MagicMock(uid=uuid.uuid4()))
+        response = self.client.get(reverse("sync"))
+        self.assertEqual(response.status_code, exceptions.SignUpRequired.status_code)
+
+    def test_invalid_token_is_rejected(self):
+        self.authenticate()
+        for since in ["yesterday", "²", "99999999999999999999999"]:
+            response = self.client.get(reverse("sync"), {"since": since})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_first_sync_returns_every_row_of_the_doctor(self):
+        data = self.sync()
+        self.assertEqual(self.ids(data["sessions"]), [self.session.pk])
+        self.assertEqual(self.ids(data["assignments"]), [self.assignment.pk])
+        self.assertEqual(self.ids(data["advices"]), [self.advice.pk])
+        self.assertEqual(data["invites"], [])
+        self.assertEqual(data["deleted"]["sessions"], [])
+        self.assertLessEqual(
+            sync.parse_token(data["token"]), datetime.now(timezone.utc)
+        )
+
+    def test_first_sync_returns_every_row_of_the_patient(self):
+        data = self.sync(user=self.patient_user)
+        self.assertEqual(self.ids(data["sessions"]), [self.session.pk])
+        self.assertEqual(self.ids(data["advices"]), [self.advice.pk])
+        self.assertEqual(self.ids(data["invites"]), [self.invite.pk])
+
+    def test_rows_are_represented_like_their_endpoints(self):
+        data = self.sync()
+        url = reverse("sessions-detail", kwargs={"pk": self.session.pk})
+        self.assertEqual(data["sessions"][0], self.client.get(url).data)
+
+    def test_unchanged_rows_are_not_synced_again(self):
+        data = self.sync(since=self.now_token())
+        for key in ["sessions", "assignments", "advices", "invites"]:
+            self.assertEqual(data[key], [])
+            self.assertEqual(data["deleted"][key], [])
+
+    def test_changed_rows_are_synced(self):
+        token = self.now_token()
+        self.session.status = "CONFIRMED"
+        self.session.save()
+        data = self.sync(since=token)
+        self.assertEqual(data["sessions"][0]["status"], "CONFIRMED")
+        """The session is nested in the assignment"""
+        self.assertEqual(self.ids(data["assignments"]), [self.assignment.pk])
+        self.assertEqual(data["advices"], [])
+
+    def test_rows_with_changed_nested_rows_are_synced(self):
+        token = self.now_token()
+        self.doctor.name = "Marcos"
+        self.doctor.save()
+        data = self.sync(user=self.patient_user, since=token)
+        self.assertEqual(data["sessions"][0]["doctor"]["name"], "Marcos")
+        self.assertEqual(self.ids(data["advices"]), [self.advice.pk])
+        self.assertEqual(data["invites"], [])
+
+        token = self.now_token()
+        self.patient.doctors.add(mommy.make(models.Doctor))
+        data = self.sync(since=token)
+        self.assertEqual(len(data["sessions"][0]["patient"]["doctors"]), 2)
+
+    def test_rows_are_not_synced_when_unnested_fields_change(self):
+        token = self.now_token()
+        doctor = models.Doctor.objects.get(pk=self.doctor.pk)
+        doctor.description = "some_other_description"
+        doctor.save()
+        patient = models.Patient.objects.get(pk=self.patient.pk)
+        patient.save()
+        data = self.sync(since=token)
+        for key in ["sessions", "assignments", "advices", "invites"]:
+            self.assertEqual(data[key], [])
+
+        patient.phone_number = "1122334455"
+        patient.save()
+        data = self.sync(since=token)
+        self.assertEqual(self.ids(data["sessions"]), [self.session.pk])
+        self.assertEqual(data["advices"], [])
+
+        token = self.now_token()
+        doctor.name = "Marcos"
+        doctor.save()
+        data = self.sync(user=self.patient_user, since=token)
+        self.assertEqual(data["sessions"][0]["doctor"]["name"], "Marcos")
+        self.assertEqual(self.ids(data["advices"]), [self.advice.pk])
+
+    def test_deleted_rows_are_synced(self):
+        token = self.now_token()
+        session_pk, invite_pk = self.session.pk, self.invite.pk
+        self.session.delete()
+        self.invite.delete()
+
+        data = self.sync(since=token)
+        self.assertEqual(data["deleted"]["sessions"], [session_pk])
+        """The assignment was deleted along with its delivery session"""
+        self.assertEqual(data["deleted"]["assignments"], [self.assignment.pk])
+        self.assertEqual(data["deleted"]["invites"], [])
+
+        data = self.sync(user=self.patient_user, since=token)
+        self.assertEqual(data["deleted"]["sessions"], [session_pk])
+        self.assertEqual(data["deleted"]["invites"], [invite_pk])
+
+    def test_moved_rows_are_deleted_for_their_previous_patient(self):
+        token = self.now_token()
+        other_patient = mommy.make(models.Patient, doctors=[self.doctor])
+        session = models.Session.objects.get(pk=self.session.pk)
+        session.patient = other_patient
+        session.save()
+        assignment = models.Assignment.objects.get(pk=self.assignment.pk)
+        assignment.patient = other_patient
+        assignment.save()
+
+        data = self.sync(user=self.patient_user, since=token)
+        self.assertEqual(data["deleted"]["sessions"], [self.session.pk])
+        self.assertEqual(data["deleted"]["assignments"], [self.assignment.pk])
+        data = self.sync(since=token)
+        self.assertEqual(self.ids(data["sessions"]), [self.session.pk])
+        self.assertEqual(data["deleted"]["sessions"], [])
+
+    def test_deleted_advices_are_synced_to_the_doctor_and_the_patients(self):
+        token = self.now_token()
+        advice_pk = self.advice.pk
+        self.advice.delete()
+        self.assertEqual(self.sync(since=token)["deleted"]["advices"], [advice_pk])
+        data = self.sync(user=self.patient_user, since=token)
+        self.assertEqual(data["deleted"]["advices"], [advice_pk])
+
+    def test_unlinked_advices_are_deleted_for_the_patient_only(self):
+        token = self.now_token()
+        self.patient.advice_set.remove(self.advice)
+        data = self.sync(user=self.patient_user, since=token)
+        self.assertEqual(data["deleted"]["advices"], [self.advice.pk])
+        data = self.sync(since=token)
+        self.assertEqual(data["deleted"]["advices"], [])
+        self.assertEqual(self.ids(data["advices"]), [self.advice.pk])
+
+        """Linked again, the advice is synced instead of deleted"""
+        self.advice.patients.add(self.patient)
+        data = self.sync(user=self.patient_user, since=token)
+        self.assertEqual(self.ids(data["advices"]), [self.advice.pk])
+        self.assertEqual(data["deleted"]["advices"], [])
+
+    def test_rows_of_other_users_are_not_synced(self):
+        other_doctor = mommy.make(models.Doctor)
+        mommy.make(
+            models.Session,
+            doctor=other_doctor,
+            patient=mommy.make(models.Patient),
+            date=datetime.now(timezone.utc),
+        ).delete()
+        mommy.make(models.Advice, doctor=other_doctor)
+        data = self.sync(
+            since=sync.make_token(datetime.now(timezone.utc) - timedelta(days=1))
+        )
+        self.assertEqual(self.ids(data["sessions"]), [self.session.pk])
+        self.assertEqual(self.ids(data["advices"]), [self.advice.pk])
+        self.assertEqual(data["deleted"]["sessions"], [])
+
+    def test_sync_runs_a_fixed_number_of_queries(self):
+        token = sync.make_token(datetime.now(timezone.utc) - timedelta(days=1))
+        self.sync(since=token)
+        mommy.make(
+            models.Session,
+            doctor=self.doctor,
+            patient=mommy.make(models.Patient, doctors=[self.doctor]),
+            date=datetime.now(timezone.utc),
+            _quantity=3,
+        )
+        """
+        The sessions with the doctors of their patients, the assignments,
+        the advices with their patients, the invites and the tombstones
+        """
+        with self.assertNumQueries(7):
+            self.sync(since=token)
@@ -15,5 +15,6 @@ router.register(r"invites", views.InviteViewSet, basename="invites")
 urlpatterns = [
     path("login", views.LoginUser.as_view(), name="login-user"),
     path("signup", views.RegisterUser.as_view(), name="register-user"),
+    path("sync", views.SyncView.as_view(), name="sync"),
     path("", include(router.urls)),
 ]
@@ -1,3 +1,6 @@
+import os
+import threading
+
 from django.urls import reverse
 from django.utils.http import urlencode
 
@@ -15,3 +18,23 @@ def reverse_querystring(
     if query_kwargs:
         return "{}?{}".format(base_url, urlencode(query_kwargs))
     return base_url
+
+
+class ForkSafeLock:
+    """
+    Lock that is replaced by a new one in a forked child process, as it may
+    have been held by another thread of the parent process
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def __enter__(self):
+        return self._lock.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self._lock.__exit__(*exc_info)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
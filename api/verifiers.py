@@ -0,0 +1,253 @@
+import json
+import os
+import re
+import time
+import urllib.request
+
+import firebase_admin
+import jwt
+from cryptography import x509
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ImproperlyConfigured
+from firebase_admin import auth, credentials
+
+from . import exceptions
+from .authentication import FirebaseUser, auth_setting
+from .utils import ForkSafeLock
+
+_app = None
+_app_pid = None
+_app_lock = ForkSafeLock()
+
+
+def get_firebase_app():
+    """
+    Returns the Firebase app, initializing it on first use. A process forked
+    after the app was initialized (e.g. a gunicorn worker of a preloaded app)
+    gets its own app, so HTTP sessions are never shared between processes.
+    """
+    global _app, _app_pid
+    pid = os.getpid()
+    if _app is not None and _app_pid == pid:
+        return _app
+    with _app_lock:
+        if _app is not None and _app_pid != pid:
+            firebase_admin.delete_app(_app)
+            _app = None
+        if _app is None:
+            _app = firebase_admin.initialize_app(_get_credentials())
+            _app_pid = pid
+    return _app
+
+
+def _get_credentials():
+    private_key = os.environ.get("FIREBASE_PRIVATE_KEY")
+    if not private_key:
+        raise ImproperlyConfigured("The FIREBASE_PRIVATE_KEY variable is not set")
+    return credentials.Certificate(
+        {
+            "type": os.environ.get("FIREBASE_ACCOUNT_TYPE"),
+            "project_id": os.environ.get("FIREBASE_PROJECT_ID"),
+            "private_key_id": os.environ.get("FIREBASE_PRIVATE_KEY_ID"),
+            "private_key": private_key.replace(r"\n", "\n"),
+            "client_email": os.environ.get("FIREBASE_CLIENT_EMAIL"),
+            "client_id": os.environ.get("FIREBASE_CLIENT_ID"),
+            "auth_uri": os.environ.get("FIREBASE_AUTH_URI"),
+            "token_uri": os.environ.get("FIREBASE_TOKEN_URI"),
+            "auth_provider_x509_cert_url": os.environ.get(
+                "FIREBASE_AUTH_PROVIDER_X509_CERT_URL"
+            ),
+            "client_x509_cert_url": os.environ.get("FIREBASE_CLIENT_X509_CERT_URL"),
+        }
+    )
+
+
+class PublicKeyCache:
+    """
+    Google's public keys used to sign Firebase ID tokens, kept for as long as
+    the Cache-Control header of the keys endpoint allows. An unknown key id
+    triggers a refresh, so rotated keys are picked up before the old set expires.
+    When a refresh fails, the last known keys are kept until the next try.
+    """
+
+    # minimum interval between refreshes caused by unknown key ids, and between
+    # the tries of a failed refresh
+    min_refresh_interval = 60
+    # minimum time the keys are kept, when the endpoint sends a shorter max-age
+    # or none at all
+    min_max_age = 60
+
+    def __init__(self):
+        self._lock = ForkSafeLock()
+        self._keys = {}
+        self._expires_at = 0
+        self._fetched_at = None
+
+    def get(self, kid):
+        key = self._keys.get(kid)
+        if key is not None and time.monotonic() < self._expires_at:
+            return key
+        with self._lock:
+            now = time.monotonic()
+            key = self._keys.get(kid)
+            if key is not None and now < self._expires_at:
+                return key
+            if key is None and now < self._expires_at:
+                fetched_recently = (
+                    self._fetched_at is not None
+                    and now - self._fetched_at < self.min_refresh_interval
+                )
+                if fetched_recently:
+                    return None
+            self._refresh()
+            return self._keys.get(kid)
+
+    def clear(self):
+        with self._lock:
+            self._keys = {}
+            self._expires_at = 0
+            self._fetched_at = None
+
+    def _refresh(self):
+        """
+        Fetches the keys again. It raises PublicKeysUnavailable when it fails
+        and there are no keys to fall back to.
+        """
+        try:
+            certificates, max_age = self._fetch()
+            keys = {
+                kid: x509.load_pem_x509_certificate(pem.encode()).public_key()
+                for kid, pem in certificates.items()
+            }
+        except (OSError, ValueError):
+            if not self._keys:
+                raise exceptions.PublicKeysUnavailable()
+            keys, max_age = self._keys, self.min_refresh_interval
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+        self._expires_at = self._fetched_at + max(max_age, self.min_max_age)
+
+    def _fetch(self):
+        """Returns the certificates keyed by key id and their max-age in seconds"""
+        url = auth_setting("PUBLIC_KEYS_URL")
+        timeout = auth_setting("PUBLIC_KEYS_TIMEOUT")
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            cache_control = response.headers.get("Cache-Control", "")
+            certificates = json.loads(response.read())
+        match = re.search(r"max-age=(\d+)", cache_control)
+        max_age = int(match.group(1)) if match else 0
+        return certificates, max_age
+
+
+public_keys = PublicKeyCache()
+
+
+def verify_id_token_locally(id_token):
+    """
+    Verifies the signature and claims of a Firebase ID token without calling
+    Firebase, following https://firebase.google.com/docs/auth/admin/verify-id-tokens.
+    Returns the decoded claims, with the "uid" claim set just like
+    firebase_admin.auth.verify_id_token does. It raises an exception when it fails.
+    """
+    header = jwt.get_unverified_header(id_token)
+    key = public_keys.get(header.get("kid"))
+    if key is None:
+        raise jwt.InvalidTokenError("The token was not signed by a known key")
+
+    project_id = get_firebase_app().project_id
+    leeway = auth_setting("CLOCK_SKEW_SECONDS")
+    claims = jwt.decode(
+        id_token,
+        key,
+        algorithms=["RS256"],
+        audience=project_id,
+        issuer=f"https://securetoken.google.com/{project_id}",
+        leeway=leeway,
+        options={"require": ["exp", "iat", "aud", "iss", "sub"]},
+    )
+    if not claims["sub"]:
+        raise jwt.InvalidTokenError("The token has no subject")
+    if claims.get("auth_time", 0) > time.time() + leeway:
+        raise jwt.InvalidTokenError(
+            "The token has an authentication time in the future"
+        )
+    claims["uid"] = claims["sub"]
+    return claims
+
+
+class BaseTokenVerifier:
+    """
+    Backend used by FirebaseAuthentication to verify the ID tokens, selected
+    with the VERIFIER key of the FIREBASE_AUTHENTICATION setting.
+    """
+
+    def verify(self, id_token):
+        """
+        Returns the decoded claims of a valid token, which have at least the
+        "uid" and "exp" claims. It raises an exception when the token is invalid.
+        """
+        raise NotImplementedError(".verify() must be overridden.")
+
+    def get_user(self, claims):
+        """Returns the user identified by the decoded claims of a token"""
+        return FirebaseUser(claims["uid"], claims.get("phone_number"))
+
+
+class FirebaseTokenVerifier(BaseTokenVerifier):
+    """
+    Verifies Firebase ID tokens locally and builds the user from their claims,
+    only fetching the user from Firebase when the claims are incomplete.
+    """
+
+    def verify(self, id_token):
+        return verify_id_token_locally(id_token)
+
+    def get_user(self, claims):
+        if claims.get("uid") and claims.get("phone_number"):
+            return super().get_user(claims)
+        return auth.get_user(claims.get("uid"), app=get_firebase_app())
+
+
+class RemoteFirebaseTokenVerifier(BaseTokenVerifier):
+    """Verifies Firebase ID tokens and fetches their user with the Firebase Admin SDK"""
+
+    def verify(self, id_token):
+        return auth.verify_id_token(id_token, app=get_firebase_app())
+
+    def get_user(self, claims):
+        return auth.get_user(claims.get("uid"), app=get_firebase_app())
+
+
+class SignedTokenVerifier(BaseTokenVerifier):
+    """
+    Verifies tokens signed with the SECRET_KEY by SignedTokenVerifier.create_token,
+    which carry the uid and phone number of the user. It doesn't talk to Firebase,
+    so it is meant for load tests on isolated machines, never for production.
+    """
+
+    salt = "api.verifiers.SignedTokenVerifier"
+
+    def __init__(self):
+        if not settings.DEBUG and not auth_setting("ALLOW_SIGNED_TOKENS"):
+            raise ImproperlyConfigured(
+                "SignedTokenVerifier accepts tokens created with the SECRET_KEY, "
+                "so it must be allowed with ALLOW_SIGNED_TOKENS when DEBUG is off"
+            )
+
+    @classmethod
+    def create_token(cls, uid, phone_number, lifetime=None):
+        if lifetime is None:
+            lifetime = auth_setting("SIGNED_TOKEN_LIFETIME")
+        claims = {
+            "uid": str(uid),
+            "phone_number": phone_number,
+            "exp": int(time.time() + lifetime),
+        }
+        return signing.dumps(claims, salt=cls.salt, compress=True)
+
+    def verify(self, id_token):
+        claims = signing.loads(id_token, salt=self.salt)
+        if not claims.get("uid") or claims.get("exp", 0) <= time.time():
+            raise signing.BadSignature("The token is expired or has no uid")
+        return claims
@@ -1,13 +1,163 @@
-import json
-
-from django.utils.timezone import datetime
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.http import StreamingHttpResponse
+from django.utils.timezone import datetime, now, timedelta
 from rest_framework import exceptions as rest_exceptions
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
-from . import authentication, enums, exceptions, models, permissions, serializers
+from . import (
+    authentication,
+    conditional,
+    enums,
+    exceptions,
+    mappers,
+    models,
+    pagination,
+    permissions,
+    renderers,
+    response_cache,
+    roles,
+    serializers,
+    sync,
+)
+
+STREAM_CHUNK_SIZE = 100
+HOME_LIST_SIZE = 10
+
+
+def wants_stream(request):
+    """Whether the client asked for the rows as a stream of NDJSON lines"""
+    return request.query_params.get("stream") == "1" or isinstance(
+        request.accepted_renderer, renderers.NDJSONRenderer
+    )
+
+
+def parse_date_param(request, name):
+    """
+    Returns the datetime in the query param with the given name, or None when
+    it was not passed. It raises an exception when it is not in Session.DATE_FORMAT.
+    """
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    """An unencoded '+' of the timezone offset arrives as a space"""
+    value = value.replace(" ", "+")
+    try:
+        return datetime.strptime(value, models.Session.DATE_FORMAT)
+    except ValueError:
+        raise rest_exceptions.ParseError(
+            "Date not in the correct format. Please use the 'YYYY-mm-ddTHH:MM:SSZ' format"
+        )
+
+
+def stream_response(
+    queryset, serializer_class, context=None, chunk_size=STREAM_CHUNK_SIZE
+):
+    """
+    Streams the rows of the queryset as NDJSON, fetching and serializing them
+    chunk by chunk so the whole list is never held in memory
+    """
+    renderer = renderers.NDJSONRenderer()
+
+    def lines():
+        chunk = []
+        for instance in queryset.iterator(chunk_size=chunk_size):
+            chunk.append(instance)
+            if len(chunk) == chunk_size:
+                data = serializer_class(chunk, many=True, context=context).data
+                yield b"".join(renderer.render_lines(data))
+                chunk = []
+        if chunk:
+            data = serializer_class(chunk, many=True, context=context).data
+            yield b"".join(renderer.render_lines(data))
+
+    return StreamingHttpResponse(lines(), content_type=renderer.media_type)
+
+
+def home_data(sessions, assignments, advices, invites):
+    """
+    Returns the first rows of each list of the home screen, in a fixed number
+    of queries: one per list, plus one per many-to-many relation of the rows
+    """
+    data = {}
+    lists = [
+        ("sessions", sessions, serializers.SessionSerializer),
+        ("assignments", assignments, serializers.AssignmentSerializer),
+        ("advices", advices, serializers.AdviceSerializer),
+    ]
+    for key, queryset, serializer_class in lists:
+        mapper = mappers.get_mapper(serializer_class)
+        rows = mapper.values(queryset)[:HOME_LIST_SIZE]
+        data[key] = mapper.to_representation(rows)
+    invites = invites.select_related("doctor")[:HOME_LIST_SIZE]
+    data["invites"] = serializers.InviteSerializer(invites, many=True).data
+    return data
+
+
+def apply_status_updates(request, model, updates):
+    """
+    Applies the status updates to the rows the user is the doctor or the
+    patient of, checking them all in one query and updating them with one
+    query per status. Returns whether each row was updated.
+    """
+    uid = request.user.uid
+    ids = [update["id"] for update in updates]
+    with transaction.atomic():
+        owned = model.objects.filter(Q(doctor=uid) | Q(patient=uid), pk__in=ids)
+        rows = {
+            pk: (doctor_id, patient_id)
+            for pk, doctor_id, patient_id in owned.values_list(
+                "pk", "doctor_id", "patient_id"
+            )
+        }
+        ids_by_status = {}
+        for update in updates:
+            if update["id"] in rows:
+                ids_by_status.setdefault(update["status"], []).append(update["id"])
+        """update() doesn't set the auto_now fields"""
+        updated_at = now()
+        for new_status, status_ids in ids_by_status.items():
+            model.objects.filter(pk__in=status_ids).update(
+                status=new_status, updated_at=updated_at
+            )
+        """update() doesn't send the signals that forget the cached lists"""
+        doctor_pks = {doctor_pk for doctor_pk, _ in rows.values()}
+        patient_pks = {patient_pk for _, patient_pk in rows.values()}
+        response_cache.forget_lists(response_cache.DOCTOR, doctor_pks)
+        response_cache.forget_lists(response_cache.PATIENT, patient_pks)
+
+    return [
+        {
+            "id": update["id"],
+            "status": update["status"],
+            "updated": update["id"] in rows,
+        }
+        for update in updates
+    ]
+
+
+class ListDataMixin:
+    """
+    Paginates and serializes the lists of the actions. The lists of the
+    serializers with a mappers.Mapper are built straight from the rows, unless
+    their fields are narrowed with ?fields=.
+    """
+
+    def get_list_data(self, queryset, serializer_class):
+        sparse_fields = serializers.get_sparse_fields(self.request)
+        mapper = mappers.get_mapper(serializer_class)
+        if mapper is not None and sparse_fields is None:
+            page = self.paginate_queryset(mapper.values(queryset))
+            return mapper.to_representation(page)
+
+        queryset = serializer_class.setup_eager_loading(queryset, sparse_fields)
+        page = self.paginate_queryset(queryset)
+        context = self.get_serializer_context()
+        return serializer_class(page, many=True, context=context).data
 
 
 class LoginUser(APIView):
@@ -23,12 +173,10 @@ class LoginUser(APIView):
     def post(self, request, format=None):
         uid = request.user.uid
 
-        if models.Doctor.objects.filter(pk=uid).exists():
-            is_doctor = True
-        elif models.Patient.objects.filter(pk=uid).exists():
-            is_doctor = False
-        else:
+        role = roles.get_role(request.user)
+        if not role.is_registered:
             raise exceptions.SignUpRequired()
+        is_doctor = role.is_doctor
 
         data = {"user_uuid": str(uid), "is_doctor": is_doctor}
         return Response(data, status=200)
@@ -50,22 +198,21 @@ class RegisterUser(APIView):
         uid = request.user.uid
         phone_number = request.user.phone_number
 
-        user_is_doctor = models.Doctor.objects.filter(pk=uid).exists()
-        user_is_patient = models.Patient.objects.filter(pk=uid).exists()
-        if user_is_doctor or user_is_patient:
-            raise exceptions.UserAlreadyRegistered()
-
         request_serializer = serializers.SignUpRequestSerializer(data=request.data)
         request_serializer.is_valid(raise_exception=True)
 
         name = request_serializer.data["name"]
         is_doctor = request_serializer.data["is_doctor"]
-        if is_doctor:
-            doctor = models.Doctor(pk=uid, name=name, phone_number=phone_number)
-            doctor.save()
-        else:
-            patient = models.Patient(pk=uid, name=name, phone_number=phone_number)
-            patient.save()
+        model = models.Doctor if is_doctor else models.Patient
+        try:
+            with transaction.atomic():
+                model.objects.create(pk=uid, name=name, phone_number=phone_number)
+        except IntegrityError:
+            """
+            The uid or the phone number is already registered, as a doctor or
+            as a patient, maybe by a retry of this same signup
+            """
+            raise exceptions.UserAlreadyRegistered()
 
         response_serializer = serializers.SignUpResponseSerializer(
             data={"user_uuid": uid}
@@ -75,6 +222,27 @@ class RegisterUser(APIView):
         return Response(response_serializer.data)
 
 
+class SyncView(APIView):
+    """
+    View to return the sessions, assignments, advices and invites of the
+    doctor or patient that changed since the sync token passed in "since",
+    along with the ids of the deleted ones and the token of the next sync
+
+    * Requires token authentication.
+    """
+
+    authentication_classes = [authentication.FirebaseAuthentication]
+    permission_classes = [permissions.HasToken]
+
+    def get(self, request, format=None):
+        role = roles.get_role(request.user)
+        if not role.is_registered:
+            raise exceptions.SignUpRequired()
+
+        since = sync.parse_token(request.query_params.get("since"))
+        return Response(sync.get_changes(role, since))
+
+
 class InviteViewSet(
     mixins.RetrieveModelMixin,
     mixins.CreateModelMixin,
@@ -99,30 +267,40 @@ class InviteViewSet(
         return super().get_permissions()
 
     def create(self, request, *args, **kwargs):
-        uid = request.user.uid
-
         phone_number = request.data.get("phone_number")
         if not phone_number:
             return rest_exceptions.bad_request(request, None)
 
-        try:
-            doctor = models.Doctor.objects.get(pk=uid)
-        except models.Doctor.DoesNotExist:
+        role = roles.get_role(request.user)
+        if not role.is_doctor:
             return rest_exceptions.PermissionDenied()
+        doctor = role.instance
 
-        try:
-            patient = models.Patient.objects.get(phone_number=phone_number)
-            if patient.doctors.filter(pk=doctor.pk).exists():
-                raise exceptions.PatientAlreadyWithDoctor()
-        except models.Patient.DoesNotExist:
+        is_with_doctor = models.Patient.doctors.through.objects.filter(
+            patient_id=OuterRef("pk"), doctor_id=doctor.pk
+        )
+        patient = (
+            models.Patient.objects.filter(phone_number=phone_number)
+            .annotate(is_with_doctor=Exists(is_with_doctor))
+            .values_list("pk", "is_with_doctor")
+            .first()
+        )
+        if patient is None:
             raise exceptions.PatientNotRegistered()
+        patient_pk, is_with_doctor = patient
+        if is_with_doctor:
+            raise exceptions.PatientAlreadyWithDoctor()
 
-        invite = models.Invite(
-            phone_number=phone_number,
-            doctor=doctor,
-            patient=patient,
-        )
-        invite.save()
+        try:
+            with transaction.atomic():
+                models.Invite.objects.create(
+                    phone_number=phone_number,
+                    doctor=doctor,
+                    patient_id=patient_pk,
+                )
+        except IntegrityError:
+            """There's already an invite from the doctor to the patient"""
+            raise exceptions.InviteAlreadySent()
 
         return Response(status=status.HTTP_201_CREATED)
 
@@ -132,14 +310,31 @@ class InviteViewSet(
         permission_classes=[permissions.HasToken, permissions.IsInviteOwner],
     )
     def accept(self, request, *args, **kwargs):
-        invite = self.get_object()
-        invite.patient.doctors.add(invite.doctor)
-        invite.delete()
+        uid = request.user.uid
+        with transaction.atomic():
+            """
+            The invite row is locked until it is consumed, and consumed only if
+            it still exists, so only one of concurrent accepts links the doctor
+            """
+            invites = models.Invite.objects.select_for_update()
+            invite = (
+                invites.filter(pk=kwargs["pk"], patient_id=uid)
+                .only("doctor_id", "patient_id")
+                .first()
+            )
+            if invite is None:
+                raise rest_exceptions.NotFound()
+            deleted, _ = invite.delete()
+            if not deleted:
+                raise rest_exceptions.NotFound()
+            models.Patient(pk=invite.patient_id).doctors.add(invite.doctor_id)
 
         return Response(status=status.HTTP_200_OK)
 
 
 class DoctorViewSet(
+    ListDataMixin,
+    conditional.ConditionalRetrieveMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
     viewsets.GenericViewSet,
@@ -156,50 +351,115 @@ class DoctorViewSet(
     serializer_class = serializers.DoctorSerializer
     queryset = models.Doctor.objects.all()
 
-    @action(detail=True, permission_classes=[permissions.HasToken, permissions.IsOwner])
+    @action(
+        detail=True,
+        permission_classes=[permissions.HasToken, permissions.IsOwner],
+        pagination_class=pagination.PatientCursorPagination,
+    )
+    @response_cache.cache_list(response_cache.DOCTOR)
     def patients(self, request, *args, **kwargs):
         uid = request.user.uid
 
         patients = models.Patient.objects.filter(doctors__pk=uid)
-        serializer = serializers.PatientSerializer(patients, many=True)
+        version = response_cache.list_version(request, response_cache.DOCTOR, uid)
+        response = conditional.not_modified(request, version)
+        if response is not None:
+            return response
+        data = self.get_list_data(patients, serializers.PatientSerializer)
 
-        return Response(json.dumps(serializer.data), status=status.HTTP_200_OK)
+        return conditional.set_version(self.get_paginated_response(data), version)
 
-    @action(detail=True, permission_classes=[permissions.HasToken, permissions.IsOwner])
+    @action(
+        detail=True,
+        permission_classes=[permissions.HasToken, permissions.IsOwner],
+        pagination_class=pagination.SessionCursorPagination,
+        renderer_classes=[
+            *api_settings.DEFAULT_RENDERER_CLASSES,
+            renderers.NDJSONRenderer,
+        ],
+    )
+    @response_cache.cache_list(response_cache.DOCTOR)
     def sessions(self, request, *args, **kwargs):
         uid = request.user.uid
-        datestr = request.query_params.get("date")
-        if not datestr:
-            sessions = models.Session.objects.filter(doctor__pk=uid)
-        else:
-            try:
-                date = datetime.strptime(datestr, models.Session.DATE_FORMAT)
-                sessions = models.Session.objects.filter(
-                    doctor__pk=uid,
-                    date__year=date.year,
-                    date__month=date.month,
-                    date__day=date.day,
-                )
-            except Exception:
-                raise rest_exceptions.ParseError(
-                    "Date not in the correct format. Please use the 'YYYY-mm-ddTHH:MM:SSZ' format"
-                )
 
-        serializer = serializers.SessionSerializer(sessions, many=True)
+        sessions = models.Session.objects.filter(doctor__pk=uid)
+        day = parse_date_param(request, "date")
+        if day is not None:
+            """The whole day of the date, in the timezone offset of the date"""
+            start = day.replace(hour=0, minute=0, second=0, microsecond=0)
+            sessions = sessions.filter(
+                date__gte=start, date__lt=start + timedelta(days=1)
+            )
+        start = parse_date_param(request, "from")
+        if start is not None:
+            sessions = sessions.filter(date__gte=start)
+        end = parse_date_param(request, "to")
+        if end is not None:
+            sessions = sessions.filter(date__lt=end)
+
+        version = response_cache.list_version(request, response_cache.DOCTOR, uid)
+        response = conditional.not_modified(request, version)
+        if response is not None:
+            return response
+        if wants_stream(request):
+            """Streams every session instead of a page of them"""
+            sessions = serializers.SessionSerializer.setup_eager_loading(
+                sessions, serializers.get_sparse_fields(request)
+            )
+            ordering = pagination.SessionCursorPagination.ordering
+            return conditional.set_version(
+                stream_response(
+                    sessions.order_by(*ordering),
+                    serializers.SessionSerializer,
+                    context=self.get_serializer_context(),
+                ),
+                version,
+            )
+        data = self.get_list_data(sessions, serializers.SessionSerializer)
 
-        return Response(json.dumps(serializer.data), status=status.HTTP_200_OK)
+        return conditional.set_version(self.get_paginated_response(data), version)
 
-    @action(detail=True, permission_classes=[permissions.HasToken, permissions.IsOwner])
+    @action(
+        detail=True,
+        permission_classes=[permissions.HasToken, permissions.IsOwner],
+        pagination_class=pagination.AdviceCursorPagination,
+    )
+    @response_cache.cache_list(response_cache.DOCTOR)
     def advices(self, request, *args, **kwargs):
         uid = request.user.uid
 
         advices = models.Advice.objects.filter(doctor__pk=uid)
-        serializer = serializers.AdviceSerializer(advices, many=True)
+        version = response_cache.list_version(request, response_cache.DOCTOR, uid)
+        response = conditional.not_modified(request, version)
+        if response is not None:
+            return response
+        data = self.get_list_data(advices, serializers.AdviceSerializer)
 
-        return Response(json.dumps(serializer.data), status=status.HTTP_200_OK)
+        return conditional.set_version(self.get_paginated_response(data), version)
+
+    @action(
+        detail=True,
+        permission_classes=[permissions.HasToken, permissions.IsOwner],
+    )
+    def home(self, request, *args, **kwargs):
+        uid = request.user.uid
+
+        data = home_data(
+            sessions=models.Session.objects.filter(
+                doctor__pk=uid, date__gte=now()
+            ).order_by("date"),
+            assignments=models.Assignment.objects.filter(
+                doctor__pk=uid, status=enums.AssignmentStatus.PENDING
+            ).order_by("id"),
+            advices=models.Advice.objects.filter(doctor__pk=uid).order_by("-id"),
+            invites=models.Invite.objects.filter(doctor__pk=uid).order_by("-id"),
+        )
+        return Response(data)
 
 
 class PatientViewSet(
+    ListDataMixin,
+    conditional.ConditionalRetrieveMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
     viewsets.GenericViewSet,
@@ -214,7 +474,9 @@ class PatientViewSet(
     permission_classes = [permissions.HasToken]
 
     serializer_class = serializers.PatientSerializer
-    queryset = models.Patient.objects.all()
+    queryset = serializers.PatientSerializer.setup_eager_loading(
+        models.Patient.objects.all()
+    )
 
     def get_permissions(self):
         if self.action == "retrieve":
@@ -226,7 +488,9 @@ class PatientViewSet(
     @action(
         detail=True,
         permission_classes=[permissions.HasToken, permissions.HasPatientInformation],
+        pagination_class=pagination.SessionCursorPagination,
     )
+    @response_cache.cache_list(response_cache.PATIENT, uncached_params=["upcoming"])
     def sessions(self, request, *args, **kwargs):
         uid = request.user.uid
         pk = kwargs["pk"]
@@ -246,14 +510,25 @@ class PatientViewSet(
         else:
             sessions = models.Session.objects.filter(patient__pk=pk)
 
-        serializer = serializers.SessionSerializer(sessions, many=True)
+        if upcoming:
+            """The upcoming sessions change with the time, so they have no version"""
+            data = self.get_list_data(sessions, serializers.SessionSerializer)
+            return self.get_paginated_response(data)
 
-        return Response(json.dumps(serializer.data), status=status.HTTP_200_OK)
+        version = response_cache.list_version(request, response_cache.PATIENT, pk)
+        response = conditional.not_modified(request, version)
+        if response is not None:
+            return response
+        data = self.get_list_data(sessions, serializers.SessionSerializer)
+
+        return conditional.set_version(self.get_paginated_response(data), version)
 
     @action(
         detail=True,
         permission_classes=[permissions.HasToken, permissions.HasPatientInformation],
+        pagination_class=pagination.AssignmentCursorPagination,
     )
+    @response_cache.cache_list(response_cache.PATIENT)
     def assignments(self, request, *args, **kwargs):
         uid = request.user.uid
         pk = kwargs["pk"]
@@ -277,14 +552,20 @@ class PatientViewSet(
         else:
             assignments = models.Assignment.objects.filter(patient__pk=pk)
 
-        serializer = serializers.AssignmentSerializer(assignments, many=True)
+        version = response_cache.list_version(request, response_cache.PATIENT, pk)
+        response = conditional.not_modified(request, version)
+        if response is not None:
+            return response
+        data = self.get_list_data(assignments, serializers.AssignmentSerializer)
 
-        return Response(json.dumps(serializer.data), status=status.HTTP_200_OK)
+        return conditional.set_version(self.get_paginated_response(data), version)
 
     @action(
         detail=True,
         permission_classes=[permissions.HasToken, permissions.HasPatientInformation],
+        pagination_class=pagination.AdviceCursorPagination,
     )
+    @response_cache.cache_list(response_cache.PATIENT)
     def advices(self, request, *args, **kwargs):
         uid = request.user.uid
         pk = kwargs["pk"]
@@ -295,12 +576,36 @@ class PatientViewSet(
         else:
             advices = models.Advice.objects.filter(doctor__pk=uid, patients__pk=pk)
 
-        serializer = serializers.AdviceSerializer(advices, many=True)
+        version = response_cache.list_version(request, response_cache.PATIENT, pk)
+        response = conditional.not_modified(request, version)
+        if response is not None:
+            return response
+        data = self.get_list_data(advices, serializers.AdviceSerializer)
+
+        return conditional.set_version(self.get_paginated_response(data), version)
+
+    @action(
+        detail=True,
+        permission_classes=[permissions.HasToken, permissions.IsOwner],
+    )
+    def home(self, request, *args, **kwargs):
+        uid = request.user.uid
 
-        return Response(json.dumps(serializer.data), status=status.HTTP_200_OK)
+        data = home_data(
+            sessions=models.Session.objects.filter(
+                patient__pk=uid, date__gte=now()
+            ).order_by("date"),
+            assignments=models.Assignment.objects.filter(
+                patient__pk=uid, status=enums.AssignmentStatus.PENDING
+            ).order_by("id"),
+            advices=models.Advice.objects.filter(patients__pk=uid).order_by("-id"),
+            invites=models.Invite.objects.filter(patient__pk=uid).order_by("-id"),
+        )
+        return Response(data)
 
 
 class SessionViewSet(
+    conditional.ConditionalRetrieveMixin,
     mixins.RetrieveModelMixin,
     mixins.CreateModelMixin,
     mixins.UpdateModelMixin,
@@ -315,11 +620,70 @@ class SessionViewSet(
     authentication_classes = [authentication.FirebaseAuthentication]
     permission_classes = [permissions.HasToken, permissions.HasSessionInformation]
 
+    version_related = ("doctor", "patient")
     serializer_class = serializers.SessionSerializer
-    queryset = models.Session.objects.all()
+    queryset = serializers.SessionSerializer.setup_eager_loading(
+        models.Session.objects.all()
+    )
+
+    @action(
+        detail=False,
+        methods=["POST"],
+        permission_classes=[permissions.HasToken, permissions.IsDoctor],
+    )
+    def group(self, request, *args, **kwargs):
+        doctor = roles.get_role(request.user).instance
+        request_serializer = serializers.SessionGroupRequestSerializer(
+            data=request.data, context={"doctor": doctor}
+        )
+        request_serializer.is_valid(raise_exception=True)
+        data = request_serializer.validated_data
+        patient_id = data["patient_id"]
+
+        with transaction.atomic():
+            group = models.SessionGroup.objects.create(
+                doctor=doctor, patient_id=patient_id
+            )
+            models.Session.objects.bulk_create(
+                models.Session(
+                    doctor=doctor,
+                    patient_id=patient_id,
+                    group_id=group,
+                    group_index=index,
+                    type=data["type"],
+                    date=date,
+                )
+                for index, date in enumerate(data["dates"], start=1)
+            )
+            """bulk_create doesn't send the signals that forget the cached lists"""
+            response_cache.forget_lists(response_cache.DOCTOR, [doctor.pk])
+            response_cache.forget_lists(response_cache.PATIENT, [patient_id])
+
+        sessions = models.Session.objects.filter(group_id=group).order_by("group_index")
+        mapper = mappers.get_mapper(serializers.SessionSerializer)
+        data = mapper.to_representation(mapper.values(sessions))
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @action(
+        detail=False,
+        methods=["POST"],
+        permission_classes=[permissions.HasToken],
+        url_path="status",
+        url_name="status",
+    )
+    def update_statuses(self, request, *args, **kwargs):
+        request_serializer = serializers.SessionStatusUpdatesRequestSerializer(
+            data=request.data
+        )
+        request_serializer.is_valid(raise_exception=True)
+        updates = request_serializer.validated_data["updates"]
+
+        results = apply_status_updates(request, models.Session, updates)
+        return Response({"results": results})
 
 
 class AssignmentViewSet(
+    conditional.ConditionalRetrieveMixin,
     mixins.RetrieveModelMixin,
     mixins.CreateModelMixin,
     mixins.UpdateModelMixin,
@@ -335,11 +699,32 @@ class AssignmentViewSet(
     authentication_classes = [authentication.FirebaseAuthentication]
     permission_classes = [permissions.HasToken, permissions.HasAssignmentInformation]
 
+    version_related = ("doctor", "delivery_session")
     serializer_class = serializers.AssignmentSerializer
-    queryset = models.Assignment.objects.all()
+    queryset = serializers.AssignmentSerializer.setup_eager_loading(
+        models.Assignment.objects.all()
+    )
+
+    @action(
+        detail=False,
+        methods=["POST"],
+        permission_classes=[permissions.HasToken],
+        url_path="status",
+        url_name="status",
+    )
+    def update_statuses(self, request, *args, **kwargs):
+        request_serializer = serializers.AssignmentStatusUpdatesRequestSerializer(
+            data=request.data
+        )
+        request_serializer.is_valid(raise_exception=True)
+        updates = request_serializer.validated_data["updates"]
+
+        results = apply_status_updates(request, models.Assignment, updates)
+        return Response({"results": results})
 
 
 class AdviceViewSet(
+    conditional.ConditionalRetrieveMixin,
     mixins.RetrieveModelMixin,
     mixins.CreateModelMixin,
     mixins.UpdateModelMixin,
@@ -355,10 +740,44 @@ class AdviceViewSet(
     authentication_classes = [authentication.FirebaseAuthentication]
     permission_classes = [permissions.HasToken, permissions.IsAdviceOwner]
 
+    version_related = ("doctor",)
     serializer_class = serializers.AdviceSerializer
-    queryset = models.Advice.objects.all()
+    queryset = serializers.AdviceSerializer.setup_eager_loading(
+        models.Advice.objects.all()
+    )
 
     def get_permissions(self):
         if self.action == "retrieve":
             return [permissions.HasToken(), permissions.HasAdviceInformation()]
         return super().get_permissions()
+
+    @action(
+        detail=False,
+        methods=["POST"],
+        permission_classes=[permissions.HasToken, permissions.IsDoctor],
+    )
+    def broadcast(self, request, *args, **kwargs):
+        doctor = roles.get_role(request.user).instance
+        request_serializer = serializers.AdviceBroadcastRequestSerializer(
+            data=request.data, context={"doctor": doctor}
+        )
+        request_serializer.is_valid(raise_exception=True)
+        data = request_serializer.validated_data
+        patient_ids = data["patient_ids"]
+
+        with transaction.atomic():
+            advice = models.Advice.objects.create(
+                message=data["message"], doctor=doctor
+            )
+            through = models.Advice.patients.through
+            through.objects.bulk_create(
+                through(advice=advice, patient_id=patient_id)
+                for patient_id in patient_ids
+            )
+            """bulk_create doesn't send the m2m_changed that forgets the cached lists"""
+            response_cache.forget_lists(response_cache.PATIENT, patient_ids)
+
+        advices = models.Advice.objects.filter(pk=advice.pk)
+        mapper = mappers.get_mapper(serializers.AdviceSerializer)
+        data = mapper.to_representation(mapper.values(advices))[0]
+        return Response(data, status=status.HTTP_201_CREATED)